@@ -0,0 +1,364 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+
+from Providers.providers import get_provider
+from Graphs.indicators import MACD_FAST, MACD_SLOW, MACD_SIGNAL, RSI_PERIOD, BB_WINDOW, BB_STD
+
+# Values available to rules, in the row order of the indicator state matrix
+FIELDS = ['Close', 'MACD', 'Signal', 'RSI', 'BB_Upper', 'BB_Middle', 'BB_Lower']
+FIELD_INDEX = {name.upper(): i for i, name in enumerate(FIELDS)}
+
+ABOVE, BELOW, CROSSES_ABOVE, CROSSES_BELOW, CROSSES = range(5)
+OPERATORS = {
+    '>': ABOVE, 'above': ABOVE, 'is above': ABOVE,
+    '<': BELOW, 'below': BELOW, 'is below': BELOW,
+    'crosses above': CROSSES_ABOVE, 'breaks above': CROSSES_ABOVE, 'breaks': CROSSES_ABOVE,
+    'crosses below': CROSSES_BELOW, 'breaks below': CROSSES_BELOW,
+    'crosses': CROSSES,
+}
+RULE_PATTERN = re.compile(
+    r'^\s*(?P<lhs>[A-Za-z_]+)\s+(?P<op>' + '|'.join(sorted(map(re.escape, OPERATORS), key=len, reverse=True)) +
+    r')\s+(?P<rhs>[A-Za-z_]+|-?\d+(?:\.\d+)?)\s*$', re.IGNORECASE
+)
+
+
+def parse_rule(text):
+    """Parse rules like 'RSI crosses 30', 'MACD crosses above Signal' or 'Close breaks BB_Upper'"""
+    match = RULE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Cannot parse alert rule: {text!r}")
+    lhs = match.group('lhs').upper()
+    if lhs not in FIELD_INDEX:
+        raise ValueError(f"Unknown indicator {match.group('lhs')!r} in rule {text!r}")
+    op = OPERATORS[re.sub(r'\s+', ' ', match.group('op').lower())]
+    rhs = match.group('rhs')
+    if rhs.upper() in FIELD_INDEX:
+        return FIELD_INDEX[lhs], op, FIELD_INDEX[rhs.upper()], np.nan
+    try:
+        return FIELD_INDEX[lhs], op, -1, float(rhs)
+    except ValueError:
+        raise ValueError(f"Unknown indicator {rhs!r} in rule {text!r}")
+
+
+class IndicatorState:
+    """Incremental MACD, RSI and Bollinger Bands for many symbols at once
+
+    Produces the same values as Graphs.indicators, one bar at a time.
+    """
+
+    def __init__(self, n_symbols):
+        self.n = n_symbols
+        self.count = np.zeros(n_symbols, dtype=np.int64)
+        self.close = np.full(n_symbols, np.nan)
+        self.ema_fast = np.full(n_symbols, np.nan)
+        self.ema_slow = np.full(n_symbols, np.nan)
+        self.signal = np.full(n_symbols, np.nan)
+        self.avg_gain = np.zeros(n_symbols)
+        self.avg_loss = np.zeros(n_symbols)
+        self.window = np.full((n_symbols, BB_WINDOW), np.nan)
+        self.values = np.full((len(FIELDS), n_symbols), np.nan)
+
+    @staticmethod
+    def _ewm(previous, value, span, first):
+        alpha = 2.0 / (span + 1)
+        return np.where(first, value, alpha * value + (1 - alpha) * previous)
+
+    def update(self, closes):
+        """Advance every symbol with a non-NaN close and return the field matrix"""
+        closes = np.asarray(closes, dtype=float)
+        live = ~np.isnan(closes)
+        first = self.count == 0
+
+        ema_fast = self._ewm(self.ema_fast, closes, MACD_FAST, first)
+        ema_slow = self._ewm(self.ema_slow, closes, MACD_SLOW, first)
+        macd = ema_fast - ema_slow
+        signal = self._ewm(self.signal, macd, MACD_SIGNAL, first)
+
+        # Wilder RSI: the first RSI_PERIOD changes are averaged, then smoothed with alpha 1/RSI_PERIOD
+        delta = np.where(first, 0.0, closes - self.close)
+        smoothing = self.count > RSI_PERIOD
+        avg_gain = np.where(smoothing, self.avg_gain + (np.maximum(delta, 0.0) - self.avg_gain) / RSI_PERIOD,
+                            self.avg_gain + np.maximum(delta, 0.0) / RSI_PERIOD)
+        avg_loss = np.where(smoothing, self.avg_loss + (np.maximum(-delta, 0.0) - self.avg_loss) / RSI_PERIOD,
+                            self.avg_loss + np.maximum(-delta, 0.0) / RSI_PERIOD)
+
+        rows = np.arange(self.n)
+        window = self.window.copy()
+        window[rows, self.count % BB_WINDOW] = closes
+
+        # Symbols without a new bar keep their previous state
+        self.ema_fast = np.where(live, ema_fast, self.ema_fast)
+        self.ema_slow = np.where(live, ema_slow, self.ema_slow)
+        self.signal = np.where(live, signal, self.signal)
+        self.avg_gain = np.where(live, avg_gain, self.avg_gain)
+        self.avg_loss = np.where(live, avg_loss, self.avg_loss)
+        self.window = np.where(live[:, None], window, self.window)
+        self.close = np.where(live, closes, self.close)
+        self.count = self.count + live
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        rsi = np.where(self.count > RSI_PERIOD, rsi, np.nan)
+
+        full = self.count >= BB_WINDOW
+        middle = np.where(full, self.window.mean(axis=1), np.nan)
+        std = np.where(full, self.window.std(axis=1, ddof=1), np.nan)
+
+        values = np.vstack([self.close, self.ema_fast - self.ema_slow, self.signal, rsi,
+                            middle + BB_STD * std, middle, middle - BB_STD * std])
+        self.values = values
+        return values
+
+
+class AlertEngine:
+    """Evaluates indicator rules over a watchlist, one bar at a time"""
+
+    def __init__(self, symbols, sinks=None):
+        self.symbols = [s.strip().upper() for s in symbols]
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+        self.sinks = list(sinks or [])
+        self.state = IndicatorState(len(self.symbols))
+        self.rules = []
+        # Compiled rule table: one entry per rule, evaluated with array indexing
+        self._symbol = np.zeros(0, dtype=np.int32)
+        self._lhs = np.zeros(0, dtype=np.int8)
+        self._op = np.zeros(0, dtype=np.int8)
+        self._rhs = np.zeros(0, dtype=np.int8)
+        self._threshold = np.zeros(0)
+        self._active = np.zeros(0, dtype=bool)
+        self._previous = None
+        self.last_timestamp = None
+
+    def add_rule(self, symbol, rule):
+        """Add a rule for one symbol, or for every symbol when symbol is '*'"""
+        lhs, op, rhs, threshold = parse_rule(rule)
+        targets = range(len(self.symbols)) if symbol == '*' else [self._index[symbol.strip().upper()]]
+        targets = np.fromiter(targets, dtype=np.int32)
+        for i in targets:
+            self.rules.append((self.symbols[i], rule.strip()))
+        n = len(targets)
+        self._symbol = np.concatenate([self._symbol, targets])
+        self._lhs = np.concatenate([self._lhs, np.full(n, lhs, dtype=np.int8)])
+        self._op = np.concatenate([self._op, np.full(n, op, dtype=np.int8)])
+        self._rhs = np.concatenate([self._rhs, np.full(n, rhs, dtype=np.int8)])
+        self._threshold = np.concatenate([self._threshold, np.full(n, threshold)])
+        self._active = np.concatenate([self._active, np.zeros(n, dtype=bool)])
+        return len(self.rules) - 1
+
+    def _sides(self, values):
+        lhs = values[self._lhs, self._symbol]
+        rhs = np.where(self._rhs >= 0, values[np.maximum(self._rhs, 0), self._symbol], self._threshold)
+        return lhs, rhs
+
+    def evaluate(self, values, previous):
+        """Return a boolean mask of rules that fire for the current bar"""
+        lhs, rhs = self._sides(values)
+        above = lhs > rhs
+        below = lhs < rhs
+        if previous is None:
+            was_above = was_below = np.zeros(len(lhs), dtype=bool)
+            known = np.zeros(len(lhs), dtype=bool)
+        else:
+            prev_lhs, prev_rhs = self._sides(previous)
+            was_above = prev_lhs > prev_rhs
+            was_below = prev_lhs < prev_rhs
+            known = ~(np.isnan(prev_lhs) | np.isnan(prev_rhs))
+        crossed_up = known & ~was_above & above
+        crossed_down = known & ~was_below & below
+
+        condition = np.select(
+            [self._op == ABOVE, self._op == BELOW, self._op == CROSSES_ABOVE,
+             self._op == CROSSES_BELOW, self._op == CROSSES],
+            [above, below, crossed_up, crossed_down, crossed_up | crossed_down],
+            default=False,
+        )
+        # Level rules only fire when they become true, not on every bar they stay true
+        level = (self._op == ABOVE) | (self._op == BELOW)
+        fired = condition & ~(level & self._active)
+        self._active = condition
+        return fired
+
+    def on_bar(self, closes, timestamp=None, notify=True):
+        """Feed one bar of closes (symbol -> price, or an array in watchlist order)"""
+        if isinstance(closes, dict):
+            closes = np.array([closes.get(s, np.nan) for s in self.symbols], dtype=float)
+        previous = self._previous
+        values = self.state.update(closes).copy()
+        self._previous = values
+        self.last_timestamp = timestamp or datetime.now()
+        if not len(self.rules):
+            return []
+        fired = np.flatnonzero(self.evaluate(values, previous))
+        lhs, rhs = self._sides(values)
+        alerts = [{
+            'time': str(self.last_timestamp),
+            'symbol': self.rules[i][0],
+            'rule': self.rules[i][1],
+            'value': round(float(lhs[i]), 4),
+            'reference': round(float(rhs[i]), 4),
+        } for i in fired]
+        if alerts and notify:
+            for sink in self.sinks:
+                sink.send(alerts)
+        return alerts
+
+    def warm_up(self, closes):
+        """Seed indicator state from a wide close panel (dates x symbols) without notifying"""
+        panel = closes.reindex(columns=self.symbols)
+        for timestamp, row in zip(panel.index, panel.to_numpy(dtype=float)):
+            self.on_bar(row, timestamp, notify=False)
+
+    def replay(self, closes):
+        """Run a close panel through the engine and return every alert it produced"""
+        panel = closes.reindex(columns=self.symbols)
+        alerts = []
+        for timestamp, row in zip(panel.index, panel.to_numpy(dtype=float)):
+            alerts.extend(self.on_bar(row, timestamp))
+        return alerts
+
+    def run(self, interval="1m", poll_seconds=60, history="5d", stop=None, max_polls=None):
+        """Poll the watchlist, evaluating rules on every completed bar
+
+        The newest row of each download is the bar still forming, so it is left out until
+        a later poll returns it with its final close. Stops when the stop event is set or
+        after max_polls polls; otherwise runs forever.
+        """
+        stop = stop or threading.Event()
+        self.warm_up(_download_closes(self.symbols, history, interval).iloc[:-1])
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            if stop.wait(poll_seconds):
+                break
+            polls += 1
+            try:
+                panel = _download_closes(self.symbols, "1d", interval).iloc[:-1]
+            except Exception as e:
+                print(f"Alert polling error: {e}")
+                continue
+            if self.last_timestamp is not None:
+                panel = panel[panel.index > self.last_timestamp]
+            self.replay(panel)
+
+
+def _download_closes(symbols, period, interval):
+    return get_provider().close_panel(symbols, period=period, interval=interval, auto_adjust=False)
+
+
+class FileSink:
+    """Appends alerts to a JSON-lines file"""
+
+    def __init__(self, path="alerts.jsonl"):
+        self.path = path
+
+    def send(self, alerts):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + "\n")
+
+
+class WebhookSink:
+    """Posts alerts to a webhook URL, or prints them when no URL is configured"""
+
+    def __init__(self, url=None):
+        self.url = url or os.environ.get("ALERT_WEBHOOK_URL")
+
+    def send(self, alerts):
+        if not self.url:
+            for alert in alerts:
+                print(f"[alert] {alert['time']} {alert['symbol']}: {alert['rule']} ({alert['value']})")
+            return
+        try:
+            requests.post(self.url, json={'alerts': alerts}, timeout=10)
+        except Exception as e:
+            print(f"Webhook error: {e}")
+
+
+class StreamlitSink:
+    """Collects alerts in st.session_state for display in the app"""
+
+    def __init__(self, key="alerts", limit=100):
+        self.key = key
+        self.limit = limit
+
+    def send(self, alerts):
+        stored = st.session_state.get(self.key, []) + alerts
+        st.session_state[self.key] = stored[-self.limit:]
+
+
+def show_alerts(symbol, rules_text, period="6mo"):
+    """Replay the alert rules over recent history for one symbol and list what fired"""
+    rules = [r.strip() for r in rules_text.splitlines() if r.strip()]
+    if not rules:
+        st.info("Add one rule per line, e.g. `RSI crosses below 30`")
+        return
+    engine = AlertEngine([symbol])
+    for rule in rules:
+        engine.add_rule(symbol, rule)
+    data = get_provider().history(symbol, period=period)
+    if data.empty:
+        st.warning("No data found. Please check the symbol or try a different one.")
+        return
+    alerts = engine.replay(data[['Close']].rename(columns={'Close': symbol.strip().upper()}))
+    if alerts:
+        st.dataframe(pd.DataFrame(alerts).iloc[::-1], hide_index=True)
+    else:
+        st.info(f"No alerts fired in the last {period}")
+
+
+def _make_sink(spec):
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+    if spec.startswith("webhook"):
+        return WebhookSink(spec.partition(":")[2] or None)
+    raise ValueError(f"Unknown sink: {spec}")
+
+
+def benchmark(n_symbols=500, rules_per_symbol=10, n_bars=500, seed=0):
+    """Time rule evaluation per bar for a synthetic watchlist"""
+    rng = np.random.default_rng(seed)
+    symbols = [f"SYM{i:04d}" for i in range(n_symbols)]
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(n_bars, n_symbols)), axis=0))
+    rules = ["RSI crosses below 30", "RSI crosses above 70", "MACD crosses above Signal",
+             "MACD crosses below Signal", "Close breaks BB_Upper", "Close breaks below BB_Lower",
+             "RSI > 80", "RSI < 20", "Close crosses BB_Middle", "MACD crosses 0"]
+    engine = AlertEngine(symbols)
+    for rule in rules[:rules_per_symbol]:
+        engine.add_rule('*', rule)
+    start = time.perf_counter()
+    fired = 0
+    for row in prices:
+        fired += len(engine.on_bar(row))
+    elapsed = time.perf_counter() - start
+    print(f"{len(engine.rules)} rules x {n_bars} bars: {elapsed / n_bars * 1000:.2f} ms per bar, {fired} alerts")
+    return elapsed / n_bars
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run indicator alerts over a watchlist")
+    parser.add_argument("--symbols", nargs="+", help="Watchlist symbols")
+    parser.add_argument("--rule", action="append", default=[], help="Rule applied to every symbol")
+    parser.add_argument("--sink", action="append", default=[], help="file:PATH or webhook[:URL]")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--poll", type=int, default=60, help="Seconds between polls")
+    parser.add_argument("--max-polls", type=int, help="Stop after this many polls")
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark()
+    else:
+        if not args.symbols or not args.rule:
+            parser.error("--symbols and at least one --rule are required")
+        engine = AlertEngine(args.symbols, [_make_sink(s) for s in args.sink] or [WebhookSink()])
+        for rule in args.rule:
+            engine.add_rule('*', rule)
+        engine.run(interval=args.interval, poll_seconds=args.poll, max_polls=args.max_polls)
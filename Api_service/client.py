@@ -0,0 +1,126 @@
+import os
+import threading
+
+import pandas as pd
+import requests
+
+from Chat_bot.batch import InsightBatch
+from Graphs.downsample import from_arrow, ARROW_MIME
+
+API_URL_ENV = "STOCKBOT_API_URL"
+TIMEOUT = 60
+
+
+class ServiceClient:
+    """Thin client for the analysis service; one keep-alive session per client
+
+    Frames come over as compressed Arrow IPC unless binary is False.
+    """
+
+    def __init__(self, base_url, timeout=TIMEOUT, binary=True):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.binary = binary
+        self.session = requests.Session()
+
+    def _get(self, path, **params):
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        return self._payload(response)
+
+    def _post(self, path, body):
+        response = self.session.post(f"{self.base_url}{path}", json=body, timeout=self.timeout)
+        return self._payload(response)
+
+    @staticmethod
+    def _payload(response):
+        if response.status_code == 200 and response.headers.get('Content-Type', '').startswith(ARROW_MIME):
+            return from_arrow(response.content)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if response.status_code != 200:
+            raise RuntimeError(f"Analysis service error {response.status_code}: {payload.get('error', response.text[:200])}")
+        return payload
+
+    @staticmethod
+    def _frame(payload):
+        if isinstance(payload, pd.DataFrame):
+            return payload
+        if not payload.get('data'):
+            return pd.DataFrame()
+        frame = pd.DataFrame(payload['data'], index=pd.to_datetime(payload['index']), columns=payload['columns'])
+        frame = frame.apply(pd.to_numeric, errors='coerce')
+        frame.attrs.update(payload.get('attrs', {}))
+        return frame
+
+    def health(self):
+        return self._get('/health')
+
+    def _frame_params(self, max_points):
+        params = {'format': 'arrow'} if self.binary else {}
+        if max_points:
+            params['max_points'] = max_points
+        return params
+
+    def bars(self, symbol, period="3mo", max_points=None):
+        """OHLCV bars, bucketed server-side to max_points rows if given"""
+        return self._frame(self._get('/bars', symbol=symbol, period=period, **self._frame_params(max_points)))
+
+    def indicators(self, symbol, period="3mo", indicators=None, max_points=None):
+        """Bars plus MACD/RSI/Bollinger columns, Buy/Sell signals and any extra registered indicators
+
+        max_points downsamples server-side (LTTB of Close plus every signal row).
+        """
+        return self._frame(self._get('/indicators', symbol=symbol, period=period, indicators=",".join(sorted(indicators or [])),
+                                     **self._frame_params(max_points)))
+
+    def signals(self, symbol, period="3mo"):
+        return self._get('/signals', symbol=symbol, period=period)
+
+    def news(self, symbol, force=False):
+        if force:
+            return self._get('/news', symbol=symbol, force=1)
+        return self._get('/news', symbol=symbol)
+
+    def fundamentals(self, symbol):
+        return self._get('/fundamentals', symbol=symbol)
+
+    def insights(self, symbol, tasks, route_models=True):
+        return self._post('/insights', {'symbol': symbol, 'route_models': route_models, 'tasks': tasks})
+
+
+class RemoteInsightBatch(InsightBatch):
+    """InsightBatch whose tasks are answered by the analysis service in one POST"""
+
+    def __init__(self, client, symbol, route_models=True):
+        super().__init__(symbol, route_models=route_models)
+        self.client = client
+
+    def run(self):
+        tasks = [{key: task[key] for key in ('id', 'prompt', 'short', 'max_tokens')} for task in self.tasks]
+        response = self.client.insights(self.symbol, tasks, route_models=self.route_models)
+        self.requests_made += response.get('requests_made', 0)
+        self.results.update(response.get('answers', {}))
+        for task in self.tasks:
+            if task['render'] is not None:
+                task['render'](self.results.get(task['id'], "⚠️ Unable to generate a complete answer."))
+        self.tasks = []
+        return self.results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide service client when STOCKBOT_API_URL is set, else None (run everything in-process)"""
+    global _client
+    url = os.environ.get(API_URL_ENV)
+    if not url:
+        return None
+    if _client is None or _client.base_url != url.rstrip('/'):
+        with _client_lock:
+            if _client is None or _client.base_url != url.rstrip('/'):
+                _client = ServiceClient(url)
+    return _client
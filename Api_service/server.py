@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Graphs.charts import compute_chart_data
+from Graphs.indicators import INDICATORS
+from Graphs.downsample import downsample_chart, ohlc_buckets, to_arrow, ARROW_MIME
+from Graphs.patterns import latest_signals
+from News_Scrapper.news import get_latest_news
+from Fundamentals.fundamentals import load_fundamentals
+from Chat_bot.batch import InsightBatch
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+CACHE_TTL = {'bars': 60, 'indicators': 60, 'signals': 60, 'news': 120, 'fundamentals': 3600}
+# Distinct (endpoint, params) responses kept per worker, least recently used dropped first
+CACHE_MAX_ENTRIES = 1024
+MAX_BODY = 1 << 20
+KEEP_ALIVE_SECONDS = 15
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _frame_payload(frame, params):
+    """Frame as pandas split JSON, or as (content type, bytes) Arrow IPC with format=arrow"""
+    if params.get('format') == 'arrow':
+        return ARROW_MIME, to_arrow(frame)
+    payload = json.loads(frame.to_json(orient='split', date_format='iso', double_precision=10))
+    if frame.attrs:
+        payload['attrs'] = frame.attrs
+    return payload
+
+
+def _json_safe(value):
+    """value with NaN/inf floats (missing ratios, indicator warm-up) replaced by None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _max_points(params):
+    try:
+        return int(params['max_points']) if params.get('max_points') else None
+    except ValueError:
+        raise ServiceError(400, "max_points must be an integer")
+
+
+def _symbol(params):
+    symbol = params.get('symbol', '').strip().upper()
+    if not symbol:
+        raise ServiceError(400, "symbol is required")
+    return symbol
+
+
+class AnalysisService:
+    """Request handlers plus a TTL response cache that coalesces identical in-flight requests
+
+    Handlers are blocking (network + numpy), so they run on a thread pool while the
+    event loop keeps accepting connections.
+    """
+
+    def __init__(self, max_workers=8, max_entries=CACHE_MAX_ENTRIES):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('GET', '/bars'): self.bars,
+            ('GET', '/indicators'): self.indicators,
+            ('GET', '/signals'): self.signals,
+            ('GET', '/news'): self.news,
+            ('GET', '/fundamentals'): self.fundamentals,
+            ('POST', '/insights'): self.insights,
+        }
+
+    def health(self, params, body):
+        return {'status': 'ok', 'pid': os.getpid(), 'cached': len(self._cache)}
+
+    def bars(self, params, body):
+        """OHLCV bars; max_points=N buckets them (first/max/min/last/sum)"""
+        data = compute_chart_data(_symbol(params), period=params.get('period', '3mo'))
+        if data.empty:
+            return _frame_payload(data, params)
+        bars = data[['Open', 'High', 'Low', 'Close', 'Volume']]
+        max_points = _max_points(params)
+        return _frame_payload(ohlc_buckets(bars, max_points) if max_points else bars, params)
+
+    def indicators(self, params, body):
+        """Default indicators plus any registered extras named in indicators=ATR,VWAP,...
+
+        max_points=N keeps only the LTTB points of Close plus every signal row.
+        """
+        extra = [name for name in params.get('indicators', '').split(',') if name]
+        unknown = [name for name in extra if name not in INDICATORS]
+        if unknown:
+            raise ServiceError(400, f"unknown indicators {unknown}")
+        data = compute_chart_data(_symbol(params), period=params.get('period', '3mo'), indicators=extra)
+        max_points = _max_points(params)
+        return _frame_payload(downsample_chart(data, max_points)[0] if max_points and not data.empty else data, params)
+
+    def signals(self, params, body):
+        data = compute_chart_data(_symbol(params), period=params.get('period', '3mo'))
+        if data.empty:
+            return {}
+        latest = data.iloc[-1]
+        return {
+            'buy': {str(k): v for k, v in data['Buy'].dropna().items()},
+            'sell': {str(k): v for k, v in data['Sell'].dropna().items()},
+            'latest': {column: float(latest[column]) for column in ('Close', 'MACD', 'Signal', 'RSI', 'BB_Upper', 'BB_Lower')},
+            'patterns': latest_signals(data),
+        }
+
+    def news(self, params, body):
+        return get_latest_news(_symbol(params), force=params.get('force') in ('1', 'true'))
+
+    def fundamentals(self, params, body):
+        symbol = _symbol(params)
+        return load_fundamentals([symbol]).get(symbol) or {}
+
+    def insights(self, params, body):
+        """Answer a batch of insight tasks: {"symbol": ..., "route_models": bool, "tasks": [{id, prompt, short}]}"""
+        try:
+            request = json.loads(body or b'{}')
+            symbol = _symbol(request)
+            tasks = [(task['id'], task['prompt'], task.get('short', False), task.get('max_tokens'))
+                     for task in request.get('tasks', [])]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ServiceError(400, f"invalid insights request: {type(e).__name__}: {e}")
+        # Another worker process may have served /indicators, /news and /fundamentals, so make
+        # sure this one has the prompt context (each call hits a warm cache when it does)
+        compute_chart_data(symbol, period=request.get('period', '3mo'))
+        get_latest_news(symbol)
+        load_fundamentals([symbol])
+        batch = InsightBatch(symbol, route_models=request.get('route_models', True))
+        for task_id, prompt, short, max_tokens in tasks:
+            batch.add(task_id, prompt, short=short, max_tokens=max_tokens)
+        return {'answers': batch.run(), 'requests_made': batch.requests_made}
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            known = any(path == url.path for _, path in self.routes)
+            raise ServiceError(405 if known else 404, f"{method} {url.path} not supported")
+        params = dict(parse_qsl(url.query))
+        if method != 'GET' or url.path == '/health':
+            return await self._run(handler, params, body)
+
+        # force/fresh skip the cached copy but still replace it, so later reads see the refresh
+        fresh = params.pop('fresh', None) or params.get('force') in ('1', 'true')
+        kind = url.path.strip('/')
+        key = (kind, tuple(sorted((k, v) for k, v in params.items() if k != 'force')))
+        hit = self._cache.get(key)
+        if hit and hit[0] > time.monotonic() and not fresh:
+            self._cache.move_to_end(key)
+            return hit[1]
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            payload = await self._run(handler, params, body)
+            self._remember(key, CACHE_TTL.get(kind, 60), payload)
+            future.set_result(payload)
+            return payload
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _remember(self, key, ttl, payload):
+        """Cache a response, dropping expired entries and then the least recently used"""
+        now = time.monotonic()
+        for stale in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[stale]
+        self._cache[key] = (now + ttl, payload)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _run(self, handler, params, body):
+        """(content type, body bytes) for a handler result; handlers may return binary pairs"""
+        loop = asyncio.get_running_loop()
+        payload = await loop.run_in_executor(self.executor, handler, params, body)
+        if isinstance(payload, tuple):
+            return payload
+        return 'application/json', json.dumps(_json_safe(payload), default=str, allow_nan=False).encode('utf-8')
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, json.dumps({'error': 'bad request line'}).encode(), close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, json.dumps({'error': 'invalid Content-Length'}).encode(), close=True)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, json.dumps({'error': 'body too large'}).encode(), close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+                try:
+                    status, (content_type, payload) = 200, await self.dispatch(method.upper(), target, body)
+                except ServiceError as e:
+                    status, content_type, payload = e.status, 'application/json', json.dumps({'error': str(e)}).encode()
+                except Exception as e:
+                    status, content_type = 500, 'application/json'
+                    payload = json.dumps({'error': f"{type(e).__name__}: {e}"}).encode()
+                await self._respond(writer, status, payload, close, content_type)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, close=False, content_type='application/json'):
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+
+
+async def _serve(host, port, threads, reuse_port):
+    service = AnalysisService(max_workers=threads)
+    server = await asyncio.start_server(service.handle_connection, host, port, reuse_port=reuse_port or None)
+    print(f"Analysis service pid {os.getpid()} listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def _worker(host, port, threads, reuse_port):
+    try:
+        asyncio.run(_serve(host, port, threads, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=1, threads=8):
+    """Run the service; with workers > 1, one process per worker shares the port via SO_REUSEPORT"""
+    if workers <= 1:
+        _worker(host, port, threads, False)
+        return
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        print("SO_REUSEPORT is not available on this platform; running a single worker")
+        _worker(host, port, threads, False)
+        return
+    processes = [multiprocessing.Process(target=_worker, args=(host, port, threads, True), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON analysis service")
+    parser.add_argument("--host", default=os.environ.get("STOCKBOT_API_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("STOCKBOT_API_PORT", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes sharing the port")
+    parser.add_argument("--threads", type=int, default=8, help="Blocking-work threads per process")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.threads)
@@ -0,0 +1,133 @@
+import json
+import re
+
+from Chat_bot.chatbot import query_groq, SYSTEM_PROMPT, ANALYSIS_MAX_TOKENS, INSIGHT_MAX_TOKENS
+from Chat_bot.context import build_user_message
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+# Short one-liner tasks go to a smaller, faster model when routing is on
+FAST_MODEL = "llama-3.1-8b-instant"
+MAX_BATCH_TOKENS = 2500
+
+
+def answers_schema(task_ids):
+    """JSON schema the batched response must follow: one string answer per task id"""
+    return {
+        "type": "object",
+        "properties": {
+            "answers": {
+                "type": "object",
+                "properties": {task_id: {"type": "string"} for task_id in task_ids},
+                "required": list(task_ids),
+                "additionalProperties": False,
+            }
+        },
+        "required": ["answers"],
+    }
+
+
+def parse_answers(content, task_ids):
+    """Extract {task_id: answer} from a batched JSON response, or None if unusable"""
+    if not content:
+        return None
+    content = re.sub(r'^\s*```(?:json)?\s*|\s*```\s*$', '', content.strip())
+    try:
+        data = json.loads(content)
+    except ValueError:
+        match = re.search(r'\{.*\}', content, re.DOTALL)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            return None
+    answers = data.get("answers", data) if isinstance(data, dict) else None
+    if not isinstance(answers, dict):
+        return None
+    return {task_id: answers[task_id].strip() for task_id in task_ids
+            if isinstance(answers.get(task_id), str) and answers[task_id].strip()}
+
+
+class InsightBatch:
+    """Collects the LLM tasks for one symbol during a page run and answers them together
+
+    Each task gets a render callback; run() sends one structured request per model,
+    splits the JSON answers back out, and falls back to individual calls for any
+    task the batched response did not answer.
+    """
+
+    def __init__(self, symbol, route_models=True, context_budget=None):
+        self.symbol = symbol
+        self.route_models = route_models
+        self.context_budget = context_budget
+        self.tasks = []
+        self.results = {}
+        self.requests_made = 0
+
+    def add(self, task_id, prompt, short=False, max_tokens=None, render=None):
+        """Queue a task; short tasks are one-liners eligible for the fast model"""
+        self.tasks.append({
+            'id': task_id,
+            'prompt': prompt,
+            'short': short,
+            'max_tokens': max_tokens or (INSIGHT_MAX_TOKENS if short else ANALYSIS_MAX_TOKENS),
+            'render': render,
+        })
+        return task_id
+
+    def _model(self, task):
+        return FAST_MODEL if self.route_models and task['short'] else DEFAULT_MODEL
+
+    def _user_message(self, query):
+        if self.context_budget is None:
+            return build_user_message(query, self.symbol)
+        return build_user_message(query, self.symbol, self.context_budget)
+
+    def _ask(self, model, query, max_tokens, response_format=None):
+        self.requests_made += 1
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": self._user_message(query)},
+        ]
+        result = query_groq(messages, model=model, max_tokens=max_tokens, response_format=response_format)
+        if "error" in result:
+            return None, f"Error from API: {result['error']}"
+        try:
+            return result["choices"][0]["message"]["content"].strip(), None
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None, "⚠️ Unable to generate a complete answer."
+
+    def _run_single(self, task):
+        content, error = self._ask(self._model(task), task['prompt'], task['max_tokens'])
+        return content or error
+
+    def _run_group(self, model, tasks):
+        if len(tasks) == 1:
+            return {tasks[0]['id']: self._run_single(tasks[0])}
+        task_ids = [task['id'] for task in tasks]
+        listing = "\n".join(f"- {task['id']} (max ~{task['max_tokens']} tokens): {task['prompt']}" for task in tasks)
+        query = (
+            "Answer each task below separately, using the data above. Reply with only a JSON object "
+            f"matching this schema: {json.dumps(answers_schema(task_ids))}. "
+            "Answers are markdown strings.\n\nTasks:\n" + listing
+        )
+        max_tokens = min(sum(task['max_tokens'] for task in tasks), MAX_BATCH_TOKENS)
+        content, _ = self._ask(model, query, max_tokens, response_format={"type": "json_object"})
+        answers = parse_answers(content, task_ids) or {}
+        for task in tasks:
+            if task['id'] not in answers:
+                answers[task['id']] = self._run_single(task)
+        return answers
+
+    def run(self):
+        """Answer every queued task, call its render callback and return {task_id: text}"""
+        groups = {}
+        for task in self.tasks:
+            groups.setdefault(self._model(task), []).append(task)
+        for model, tasks in groups.items():
+            self.results.update(self._run_group(model, tasks))
+        for task in self.tasks:
+            if task['render'] is not None:
+                task['render'](self.results[task['id']])
+        self.tasks = []
+        return self.results
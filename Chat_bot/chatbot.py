@@ -1,8 +1,9 @@
 import os
-import requests
 import streamlit as st
 from dotenv import load_dotenv
 import re
+from Providers.providers import get_provider
+from Chat_bot.context import build_user_message, DEFAULT_BUDGET
 load_dotenv()
 
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
@@ -13,16 +14,38 @@ headers = {
     "Content-Type": "application/json"
 }
 
-def query_groq(messages, model="llama-3.3-70b-versatile"):
+ANALYSIS_MAX_TOKENS = 1000
+INSIGHT_MAX_TOKENS = 250
+
+SYSTEM_PROMPT = (
+    "You are a professional stock market analyst. Give objective analysis of the stock named in the user "
+    "message, grounded in the data provided there.\n"
+    "Rules:\n"
+    "- Never give buy, sell or hold recommendations. If asked, say: 'I can provide technical and fundamental "
+    "analysis, but I cannot recommend whether you should buy, sell, or hold. Investment decisions should be "
+    "based on your own research, risk tolerance and goals, preferably with a licensed financial advisor.'\n"
+    "- Use the provided data points and percentages; do not invent numbers. Say when data is missing.\n"
+    "- Be clear and professional; explain technical terms in parentheses.\n"
+    "- Compare against sector and history where the data allows; mention volatility, risks and key dates.\n"
+    "For full analyses use these ### sections: MARKET SENTIMENT & EXPERT VIEWS; TECHNICAL ANALYSIS "
+    "(moving averages, RSI, MACD, volume, patterns, support/resistance); FUNDAMENTAL ANALYSIS (financial "
+    "metrics, earnings, valuation, industry); KEY INSIGHTS (main drivers, catalysts and risks, technical vs "
+    "fundamental agreement). For short questions answer briefly without sections.\n"
+    "End with: 'This analysis is for informational purposes only and should not be considered as investment advice.'"
+)
+
+def query_groq(messages, model="llama-3.3-70b-versatile", max_tokens=ANALYSIS_MAX_TOKENS, response_format=None):
     try:
         payload = {
             "model": model,
             "messages": messages,
-            "max_tokens": 1000,
+            "max_tokens": max_tokens,
             "temperature": 0.3,
             "top_p": 0.9,
         }
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+        if response_format:
+            payload["response_format"] = response_format
+        response = get_provider().post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
         return response.json()
     except Exception as e:
         return {"error": str(e)}
@@ -118,50 +141,15 @@ def display_metrics_in_columns(rsi, macd_signal, sma_signal, insights):
         with st.expander("View Detailed Analysis", expanded=False):
             st.markdown(insights)
 
-def get_bot_response(user_query, stock="stock market"):
-    system_prompt = (
-       f"You are a professional stock market analyst specializing in {stock}. Your role is to provide comprehensive, "
-        "objective analysis based on technical indicators, fundamental metrics, and market sentiment. "
-        
-        "IMPORTANT GUIDELINES:\n"
-        "- NEVER provide buy, sell, or hold recommendations\n"
-        "- If asked for investment advice or recommendations, politely explain that you can provide detailed analysis "
-        "but cannot recommend specific investment actions\n"
-        "- Focus on presenting factual data, trends, and analytical insights\n"
-        "- Use clear, professional language while avoiding complex jargon\n"
-        "- Present information objectively without bias toward bullish or bearish sentiment\n\n"
-        "- Use professional language while keeping explanations accessible\n"
-
-        "Structure your response in 3 clear sections:\n"
-        "1. MARKET SENTIMENT & EXPERT VIEWS: Current market perception, analyst opinions, and overall sentiment\n"
-        "2. TECHNICAL ANALYSIS: Key technical indicators (moving averages, RSI, MACD, volume, price patterns, support/resistance levels)\n"
-        "3. FUNDAMENTAL ANALYSIS: Financial metrics, earnings data, valuation ratios, company performance, and industry factors\n\n"
-        
-        "Key Insights:\n"
-        "- Most significant factors currently affecting the stock"
-        "- Potential catalysts or risk factors to monitor"
-        "- Technical and fundamental convergence/divergence"
-        "\n\n"
-        "If someone asks for investment recommendations, respond with: "
-        "'I can provide you with comprehensive technical and fundamental analysis to help you understand the stock's current position, "
-        "but I cannot recommend whether you should buy, sell, or hold. Investment decisions should be made based on your own "
-        "research, risk tolerance, and financial goals, preferably with consultation from a licensed financial advisor.'\n\n"
-
-        # Enhanced system prompt additions:
-        "- Use specific data points and percentages when available"
-        "- Explain technical terms in parentheses for clarity"
-        "- Prioritize the most recent and relevant information"
-        "- Use comparative analysis (vs. sector, vs. historical performance)"
-        "- Include risk assessment and volatility analysis"
-        "- Mention key dates for earnings, events, or announcements"
-        
-        "End your analysis with: 'This analysis is for informational purposes only and should not be considered as investment advice.'")
+def get_bot_response(user_query, stock="stock market", max_tokens=ANALYSIS_MAX_TOKENS, context_budget=DEFAULT_BUDGET):
+    # The system prompt never changes, so provider-side prompt caching can reuse it;
+    # everything specific to this request goes in the user turn
     messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_query}
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_user_message(user_query, stock, context_budget)}
     ]
     with st.spinner("🤖 Generating AI recommendation..."):
-        result = query_groq(messages)
+        result = query_groq(messages, max_tokens=max_tokens)
     if "error" in result:
         return f"Error from API: {result['error']}"
     try:
@@ -169,14 +157,17 @@ def get_bot_response(user_query, stock="stock market"):
     except:
         return "⚠️ Unable to generate a complete answer."
 
-def generate_ai_insights(rsi, macd_signal, sma_signal):
-    prompt = (
+def indicator_insights_prompt(rsi, macd_signal, sma_signal):
+    return (
         f"You are a financial assistant. Based on these:\n"
         f"- RSI: {rsi}\n"
         f"- SMA Signal: {sma_signal}\n"
         f"- MACD Signal: {macd_signal}\n\n"
         "Write short, user-friendly insights for each indicator in one line. Avoid technical jargon."
     )
+
+def generate_ai_insights(rsi, macd_signal, sma_signal):
+    prompt = indicator_insights_prompt(rsi, macd_signal, sma_signal)
     messages = [
         {"role": "system", "content": "You are a financial assistant."},
         {"role": "user", "content": prompt}
@@ -0,0 +1,193 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+# Rough chars-per-token ratio for Llama-style tokenizers on English + numbers
+CHARS_PER_TOKEN = 4
+DEFAULT_BUDGET = 400
+MAX_SYMBOLS = 256
+
+_lock = threading.Lock()
+_indicators = OrderedDict()
+_news = OrderedDict()
+_fundamentals = OrderedDict()
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting prompt context"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _remember(cache, symbol, value):
+    with _lock:
+        cache[symbol.strip().upper()] = value
+        cache.move_to_end(symbol.strip().upper())
+        while len(cache) > MAX_SYMBOLS:
+            cache.popitem(last=False)
+
+
+def cache_indicators(symbol, data, zones=None):
+    """Keep a compact summary of a computed indicator frame (and optional S/R zones) for later prompts"""
+    close = data['Close'].dropna()
+    if close.empty:
+        return
+    last = data.iloc[-1]
+
+    def change(days):
+        return (close.iloc[-1] / close.iloc[-days - 1] - 1) * 100 if len(close) > days else np.nan
+
+    summary = {
+        'as_of': str(data.index[-1])[:16],
+        'close': float(close.iloc[-1]),
+        'change_1d': change(1),
+        'change_5d': change(5),
+        'change_1mo': change(21),
+        'high': float(close.max()),
+        'low': float(close.min()),
+        'bars': len(close),
+        'volatility': float(close.pct_change().std() * np.sqrt(252) * 100),
+    }
+    if 'Volume' in data:
+        summary['volume'] = float(data['Volume'].iloc[-1])
+        summary['avg_volume'] = float(data['Volume'].tail(20).mean())
+    for column in ('RSI', 'MACD', 'Signal', 'BB_Upper', 'BB_Middle', 'BB_Lower', 'ATR', 'VWAP', 'Stoch_K', 'Stoch_D'):
+        if column in data:
+            summary[column] = float(last[column])
+    for column in ('SMA_Cross', 'EMA_Cross'):
+        if column in data:
+            crosses = data[column][data[column] != 0]
+            if not crosses.empty:
+                summary[column] = ("golden" if crosses.iloc[-1] > 0 else "death", str(crosses.index[-1])[:10])
+    for column in ('Buy', 'Sell'):
+        if column in data:
+            signals = data[column].dropna()
+            if not signals.empty:
+                summary[f'last_{column.lower()}'] = (str(signals.index[-1])[:10], float(signals.iloc[-1]))
+    if zones is not None:
+        for kind in ('support', 'resistance'):
+            nearest = zones[zones['kind'] == kind].head(2)
+            summary[kind] = [(float(z.low), float(z.high), int(z.touches)) for z in nearest.itertuples()]
+    _remember(_indicators, symbol, summary)
+
+
+def cache_news(symbol, news_items):
+    """Keep the latest headlines for a symbol, skipping fallback portal links"""
+    headlines = [(item['title'], item.get('source', '')) for item in news_items
+                 if isinstance(item, dict) and item.get('api') not in ('Fallback', 'Info')]
+    if headlines:
+        _remember(_news, symbol, headlines)
+
+
+def cache_fundamentals(symbol, lines):
+    """Keep preformatted fundamentals lines for a symbol"""
+    if lines:
+        _remember(_fundamentals, symbol, list(lines))
+
+
+def _fmt(value, spec=".2f", suffix=""):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "n/a"
+    return f"{value:{spec}}{suffix}"
+
+
+def _price_section(s):
+    lines = [
+        f"Close {_fmt(s['close'])} as of {s['as_of']}; change 1d {_fmt(s['change_1d'], '+.2f', '%')}, "
+        f"5d {_fmt(s['change_5d'], '+.2f', '%')}, 1mo {_fmt(s['change_1mo'], '+.2f', '%')}",
+        f"{s['bars']}-bar range {_fmt(s['low'])}-{_fmt(s['high'])}; annualized volatility {_fmt(s['volatility'], '.1f', '%')}",
+    ]
+    if 'volume' in s:
+        lines.append(f"Volume {_fmt(s['volume'], ',.0f')} vs 20-bar avg {_fmt(s['avg_volume'], ',.0f')}")
+    return lines
+
+
+def _indicator_section(s):
+    lines = []
+    if 'RSI' in s:
+        zone = "overbought" if s['RSI'] > 70 else "oversold" if s['RSI'] < 30 else "neutral"
+        lines.append(f"Wilder RSI(14) {_fmt(s['RSI'], '.1f')} ({zone})")
+    if 'MACD' in s and 'Signal' in s:
+        side = "above" if s['MACD'] > s['Signal'] else "below"
+        lines.append(f"MACD {_fmt(s['MACD'])} {side} signal {_fmt(s['Signal'])}")
+    if 'BB_Upper' in s and 'BB_Lower' in s:
+        width = s['BB_Upper'] - s['BB_Lower']
+        position = (s['close'] - s['BB_Lower']) / width * 100 if width else np.nan
+        lines.append(f"Bollinger {_fmt(s['BB_Lower'])}/{_fmt(s.get('BB_Middle'))}/{_fmt(s['BB_Upper'])}, "
+                     f"close at {_fmt(position, '.0f', '%')} of band")
+    if 'ATR' in s:
+        lines.append(f"ATR(14) {_fmt(s['ATR'])} ({_fmt(s['ATR'] / s['close'] * 100, '.1f', '%')} of price)")
+    if 'VWAP' in s:
+        lines.append(f"VWAP {_fmt(s['VWAP'])}, close {'above' if s['close'] > s['VWAP'] else 'below'}")
+    if 'Stoch_K' in s:
+        lines.append(f"Stochastic %K {_fmt(s['Stoch_K'], '.1f')} / %D {_fmt(s.get('Stoch_D'), '.1f')}")
+    for column, name in (('SMA_Cross', 'SMA 20/50'), ('EMA_Cross', 'EMA 12/26')):
+        if column in s:
+            kind, date = s[column]
+            lines.append(f"Last {name} {kind} cross {date}")
+    for kind in ('support', 'resistance'):
+        if s.get(kind):
+            zones = ", ".join(f"{low:.2f}-{high:.2f} ({touches} touches)" for low, high, touches in s[kind])
+            lines.append(f"{kind.capitalize()} zones: {zones}")
+    for kind in ('buy', 'sell'):
+        if f'last_{kind}' in s:
+            date, price = s[f'last_{kind}']
+            lines.append(f"Last {kind} signal {date} at {_fmt(price)}")
+    return lines
+
+
+def build_context(symbol, budget_tokens=DEFAULT_BUDGET, extra_sections=None):
+    """Compact, structured data summary for a symbol that fits in budget_tokens
+
+    Sections are added in priority order (price, indicators, fundamentals, extras, news) and
+    cut off line by line once the budget is spent.
+    """
+    key = symbol.strip().upper()
+    with _lock:
+        indicators = _indicators.get(key)
+        headlines = list(_news.get(key, []))
+        fundamentals = list(_fundamentals.get(key, []))
+
+    sections = []
+    if indicators:
+        sections.append(("PRICE", _price_section(indicators)))
+        sections.append(("INDICATORS", _indicator_section(indicators)))
+    if fundamentals:
+        sections.append(("FUNDAMENTALS", fundamentals))
+    for title, lines in (extra_sections or []):
+        sections.append((title, lines))
+    if headlines:
+        sections.append(("NEWS", [f"{title} ({source})" if source else title for title, source in headlines]))
+
+    out = []
+    used = 0
+    for title, lines in sections:
+        header = f"[{title}]"
+        if not lines or used + estimate_tokens(header) > budget_tokens:
+            continue
+        block = [header]
+        # The header is only paid for if at least one of its lines fits after it
+        spent = used + estimate_tokens(header) + 1
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if spent + cost > budget_tokens:
+                break
+            block.append(f"- {line}")
+            spent += cost
+        if len(block) > 1:
+            out.extend(block)
+            used = spent
+    return "\n".join(out)
+
+
+def build_user_message(query, symbol, budget_tokens=DEFAULT_BUDGET, extra_sections=None):
+    """User turn carrying the symbol, the data context and the question"""
+    context = build_context(symbol, budget_tokens, extra_sections)
+    parts = [f"Stock: {symbol}", f"Date: {datetime.now():%Y-%m-%d}"]
+    if context:
+        parts.append(f"Data we already have (use it, cite numbers):\n{context}")
+    else:
+        parts.append("No computed data is available; say so where numbers would be needed.")
+    parts.append(f"Question: {query}")
+    return "\n\n".join(parts)
@@ -0,0 +1,309 @@
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from Providers.providers import get_provider
+from Chat_bot.context import cache_fundamentals
+
+STORE_PATH = os.environ.get("FUNDAMENTALS_STORE_PATH", "fundamentals.parquet")
+MAX_WORKERS = 8
+
+# Normalised column -> yfinance info key
+INFO_FIELDS = {
+    'market_cap': 'marketCap',
+    'trailing_pe': 'trailingPE',
+    'forward_pe': 'forwardPE',
+    'price_to_book': 'priceToBook',
+    'peg_ratio': 'pegRatio',
+    'ev_to_ebitda': 'enterpriseToEbitda',
+    'dividend_yield': 'dividendYield',
+    'profit_margin': 'profitMargins',
+    'operating_margin': 'operatingMargins',
+    'return_on_equity': 'returnOnEquity',
+    'debt_to_equity': 'debtToEquity',
+    'revenue_growth': 'revenueGrowth',
+    'earnings_growth': 'earningsGrowth',
+    'eps': 'trailingEps',
+    'beta': 'beta',
+}
+STATEMENT_FIELDS = ['revenue', 'net_income', 'revenue_yoy', 'net_income_yoy']
+CATEGORY_FIELDS = ['sector', 'industry', 'currency']
+# Lower is cheaper/safer for these, so they rank ascending
+ASCENDING_RANKS = {'trailing_pe', 'forward_pe', 'price_to_book', 'peg_ratio', 'ev_to_ebitda', 'debt_to_equity', 'beta'}
+# A P/E at or below zero means losses, not cheapness; it is left out of ranks and peer medians
+POSITIVE_ONLY = {'trailing_pe', 'forward_pe'}
+# Percentile ranks within smaller groups say nothing, so they are left out
+MIN_PEERS = 5
+
+COLUMNS = ['name'] + CATEGORY_FIELDS + list(INFO_FIELDS) + STATEMENT_FIELDS + ['next_earnings', 'fetched_at']
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return value if np.isfinite(value) else np.nan
+
+
+def _statement_value(statement, row, offset=0):
+    if statement is None or statement.empty or row not in statement.index or statement.shape[1] <= offset:
+        return np.nan
+    columns = sorted(statement.columns, reverse=True)
+    return _number(statement.loc[row, columns[offset]])
+
+
+def _growth(current, previous):
+    if np.isnan(current) or np.isnan(previous) or previous == 0:
+        return np.nan
+    return (current - previous) / abs(previous)
+
+
+def _next_earnings(calendar):
+    dates = calendar.get('Earnings Date') if isinstance(calendar, dict) else None
+    if not dates:
+        return pd.NaT
+    if not isinstance(dates, (list, tuple)):
+        dates = [dates]
+    parsed = pd.to_datetime(pd.Series(dates, dtype=object).astype(str), errors='coerce').dropna()
+    return parsed.min() if not parsed.empty else pd.NaT
+
+
+def fetch_fundamentals(symbol):
+    """Info, annual income statement and earnings calendar for one symbol, normalised to a row"""
+    provider = get_provider()
+    symbol = symbol.strip().upper()
+    info = provider.info(symbol) or {}
+    try:
+        statement = provider.financials(symbol)
+    except Exception as e:
+        print(f"Financials error for {symbol}: {e}")
+        statement = None
+    try:
+        calendar = provider.calendar(symbol)
+    except Exception as e:
+        print(f"Calendar error for {symbol}: {e}")
+        calendar = {}
+
+    row = {
+        'name': info.get('longName') or info.get('shortName') or symbol,
+        'sector': info.get('sector'),
+        'industry': info.get('industry'),
+        'currency': info.get('currency'),
+    }
+    row.update({column: _number(info.get(key)) for column, key in INFO_FIELDS.items()})
+    revenue = _statement_value(statement, 'Total Revenue')
+    net_income = _statement_value(statement, 'Net Income')
+    row.update({
+        'revenue': revenue,
+        'net_income': net_income,
+        'revenue_yoy': _growth(revenue, _statement_value(statement, 'Total Revenue', 1)),
+        'net_income_yoy': _growth(net_income, _statement_value(statement, 'Net Income', 1)),
+        'next_earnings': _next_earnings(calendar),
+        'fetched_at': pd.Timestamp(datetime.now()),
+    })
+    return symbol, row
+
+
+def normalise(rows):
+    """Build the typed fundamentals table from {symbol: row} dicts"""
+    table = pd.DataFrame.from_dict(rows, orient='index').reindex(columns=COLUMNS)
+    table.index.name = 'symbol'
+    table['name'] = table['name'].astype('string')
+    for column in CATEGORY_FIELDS:
+        table[column] = table[column].astype('category')
+    for column in list(INFO_FIELDS) + STATEMENT_FIELDS:
+        table[column] = pd.to_numeric(table[column], errors='coerce').astype('float64')
+    for column in ('next_earnings', 'fetched_at'):
+        table[column] = pd.to_datetime(table[column], errors='coerce')
+    return table
+
+
+class FundamentalsStore:
+    """Local fundamentals snapshot for a watchlist, refreshed at most once a day"""
+
+    def __init__(self, path=STORE_PATH, max_workers=MAX_WORKERS):
+        self.path = path
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.table = normalise({})
+        if path and os.path.exists(path):
+            try:
+                self.table = normalise(pd.read_parquet(path).to_dict(orient='index'))
+            except Exception as e:
+                print(f"Fundamentals store load error: {e}")
+
+    def stale(self, symbols, today=None):
+        """Symbols missing from the store or last fetched before today"""
+        today = pd.Timestamp(today or datetime.now()).normalize()
+        symbols = [s.strip().upper() for s in symbols]
+        fetched = self.table['fetched_at'].reindex(symbols)
+        return [s for s, ts in zip(symbols, fetched) if pd.isna(ts) or ts < today]
+
+    def refresh(self, symbols, force=False):
+        """Fetch stale symbols in parallel and merge them into the store"""
+        todo = [s.strip().upper() for s in symbols] if force else self.stale(symbols)
+        if not todo:
+            return 0
+        rows = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo))) as pool:
+            for symbol, result in zip(todo, pool.map(_safe_fetch, todo)):
+                if result is not None:
+                    rows[symbol] = result
+        if not rows:
+            return 0
+        with self._lock:
+            fresh = normalise(rows)
+            kept = self.table.drop(index=fresh.index, errors='ignore')
+            combined = pd.concat([kept.astype(object), fresh.astype(object)])
+            self.table = normalise(combined.to_dict(orient='index'))
+            if self.path:
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                self.table.to_parquet(tmp)
+                os.replace(tmp, self.path)
+        return len(rows)
+
+    def get(self, symbol):
+        """Fundamentals row for a symbol as a dict, or None"""
+        symbol = symbol.strip().upper()
+        if symbol not in self.table.index:
+            return None
+        return self.table.loc[symbol].to_dict()
+
+    def ranks(self, by='sector', min_peers=MIN_PEERS):
+        """Percentile ranks (0-100, higher = better) of each metric within its group
+
+        Metrics with fewer than min_peers stored values in a group get NaN instead of a rank.
+        """
+        numeric = self.table[list(INFO_FIELDS) + STATEMENT_FIELDS].copy()
+        for column in POSITIVE_ONLY:
+            numeric[column] = numeric[column].where(numeric[column] > 0)
+        groups = self.table[by].astype(object).fillna('Unknown') if by else pd.Series('All', index=self.table.index)
+        ranked = {}
+        for column in numeric.columns:
+            grouped = numeric[column].groupby(groups)
+            rank = grouped.rank(pct=True, ascending=column not in ASCENDING_RANKS) * 100
+            ranked[column] = rank.where(grouped.transform('count') >= min_peers)
+        return pd.DataFrame(ranked, index=self.table.index)
+
+    def sector_relative(self, symbol, columns=('trailing_pe', 'forward_pe', 'price_to_book', 'profit_margin', 'revenue_yoy')):
+        """Metric vs its sector median for one symbol: {column: (value, sector_median, peers)}"""
+        row = self.get(symbol)
+        if row is None:
+            return {}
+        peers = self.table[self.table['sector'] == row['sector']] if pd.notna(row['sector']) else self.table.loc[[symbol.strip().upper()]]
+        medians = {column: peers[column].where(peers[column] > 0) if column in POSITIVE_ONLY else peers[column]
+                   for column in columns}
+        return {column: (row[column], float(medians[column].median()), len(peers)) for column in columns}
+
+
+def _safe_fetch(symbol):
+    try:
+        return fetch_fundamentals(symbol)[1]
+    except Exception as e:
+        print(f"Fundamentals error for {symbol}: {e}")
+        return None
+
+
+def _fmt(value, kind):
+    if value is None or pd.isna(value):
+        return "n/a"
+    if kind == 'pct':
+        return f"{value * 100:.1f}%"
+    if kind == 'big':
+        for unit, size in (('T', 1e12), ('B', 1e9), ('M', 1e6)):
+            if abs(value) >= size:
+                return f"{value / size:.2f}{unit}"
+        return f"{value:,.0f}"
+    if kind == 'date':
+        return str(value)[:10]
+    return f"{value:.2f}"
+
+
+def _text(value, default='n/a'):
+    return str(value) if pd.notna(value) and str(value) else default
+
+
+def summary_lines(store, symbol):
+    """Compact fundamentals lines for prompts"""
+    row = store.get(symbol)
+    if row is None:
+        return []
+    lines = [
+        f"{_text(row['name'], symbol.strip().upper())} | {_text(row['sector'])} / {_text(row['industry'])} | "
+        f"mkt cap {_fmt(row['market_cap'], 'big')} {_text(row['currency'], '')}".strip(),
+        f"P/E {_fmt(row['trailing_pe'], 'x')} (fwd {_fmt(row['forward_pe'], 'x')}), P/B {_fmt(row['price_to_book'], 'x')}, "
+        f"EV/EBITDA {_fmt(row['ev_to_ebitda'], 'x')}, PEG {_fmt(row['peg_ratio'], 'x')}",
+        f"Revenue {_fmt(row['revenue'], 'big')} ({_fmt(row['revenue_yoy'], 'pct')} YoY), net income "
+        f"{_fmt(row['net_income'], 'big')} ({_fmt(row['net_income_yoy'], 'pct')} YoY), EPS {_fmt(row['eps'], 'x')}",
+        f"Margins: profit {_fmt(row['profit_margin'], 'pct')}, operating {_fmt(row['operating_margin'], 'pct')}; "
+        f"ROE {_fmt(row['return_on_equity'], 'pct')}; D/E {_fmt(row['debt_to_equity'], 'x')}; beta {_fmt(row['beta'], 'x')}",
+    ]
+    relative = store.sector_relative(symbol)
+    if relative and relative['trailing_pe'][2] > 1:
+        value, median, peers = relative['trailing_pe']
+        lines.append(f"P/E vs sector median {_fmt(median, 'x')} across {peers} stored peers")
+    if pd.notna(row['next_earnings']):
+        lines.append(f"Next earnings date {_fmt(row['next_earnings'], 'date')}")
+    return lines
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_fundamentals_store():
+    """Process-wide fundamentals store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FundamentalsStore()
+    return _store
+
+
+def load_fundamentals(symbols):
+    """Make sure symbols are fresh in the store and cached for prompts"""
+    store = get_fundamentals_store()
+    store.refresh(symbols)
+    for symbol in symbols:
+        cache_fundamentals(symbol, summary_lines(store, symbol))
+    return store
+
+
+def show_fundamentals(symbol):
+    """Render the fundamentals snapshot and sector ranks in Streamlit"""
+    store = load_fundamentals([symbol])
+    row = store.get(symbol)
+    if row is None:
+        st.info("📭 No fundamentals available for this symbol")
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("P/E (TTM)", _fmt(row['trailing_pe'], 'x'))
+    col2.metric("Market Cap", _fmt(row['market_cap'], 'big'))
+    col3.metric("Profit Margin", _fmt(row['profit_margin'], 'pct'))
+    col4.metric("Revenue YoY", _fmt(row['revenue_yoy'], 'pct'))
+    st.caption(f"{_text(row['sector'], 'Unknown sector')} • next earnings {_fmt(row['next_earnings'], 'date')} "
+               f"• updated {_fmt(row['fetched_at'], 'date')}")
+    ranks = store.ranks().loc[symbol.strip().upper()].dropna().round(0)
+    if not ranks.empty:
+        st.write("**Sector percentile ranks** (higher = better, among stored symbols):")
+        st.bar_chart(ranks)
+    else:
+        st.caption(f"Sector ranks appear once at least {MIN_PEERS} symbols from the sector have been loaded")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the fundamentals store for a watchlist")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--force", action="store_true", help="Refetch even if fetched today")
+    args = parser.parse_args()
+    store = get_fundamentals_store()
+    print(f"Refreshed {store.refresh(args.symbols, force=args.force)} symbols")
+    print(store.table.drop(columns=['fetched_at']).to_string())
@@ -1,4 +1,3 @@
-import yfinance as yf
 import matplotlib.pyplot as plt
 import streamlit as st
 import seaborn as sns
@@ -6,131 +5,187 @@ sns.set_style("whitegrid")
 
 import pandas as pd
 import numpy as np
-from Chat_bot.chatbot import get_bot_response
-
-def calculate_macd(data, fast=12, slow=26, signal=9):
-    exp1 = data['Close'].ewm(span=fast, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=slow, adjust=False).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    return macd, signal_line
-
-def calculate_rsi(data, period=14):
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+from Chat_bot.chatbot import get_bot_response, INSIGHT_MAX_TOKENS
+from Chat_bot.context import cache_indicators
+from Providers.providers import cached_history
+from Graphs.patterns import support_resistance, candlestick_patterns
+from Graphs.downsample import downsample_chart, bar_width, CHART_WIDTH_PX
+
+from Graphs.indicators import (
+    MACD_FAST, MACD_SLOW, MACD_SIGNAL, RSI_PERIOD, BB_WINDOW, BB_STD, SMA_FAST, SMA_SLOW,
+    INDICATORS, DEFAULT_INDICATORS, SELECTABLE, FrameCache, compute_indicators, crossover_signals,
+)
+
+# Indicators drawn when the user has not picked any
+CHART_DEFAULTS = ['Bollinger', 'MACD', 'RSI']
+
+# Column -> (legend label, plot style) for indicator lines
+LINE_STYLES = {
+    'BB_Upper': ('Bollinger Upper', dict(color='magenta', linestyle='--', linewidth=1)),
+    'BB_Middle': ('Bollinger Middle', dict(color='black', linestyle='--', linewidth=1)),
+    'BB_Lower': ('Bollinger Lower', dict(color='magenta', linestyle='--', linewidth=1)),
+    'MACD': ('MACD', dict(color='purple')),
+    'Signal': ('Signal Line', dict(color='orange')),
+    'RSI': ('RSI', dict(color='brown')),
+    'ATR': ('ATR', dict(color='teal')),
+    'VWAP': ('VWAP', dict(color='darkorange', linewidth=1.2)),
+    f'SMA_{SMA_FAST}': (f'SMA {SMA_FAST}', dict(color='olive', linewidth=1)),
+    f'SMA_{SMA_SLOW}': (f'SMA {SMA_SLOW}', dict(color='navy', linewidth=1)),
+    f'EMA_{MACD_FAST}': (f'EMA {MACD_FAST}', dict(color='goldenrod', linewidth=1)),
+    f'EMA_{MACD_SLOW}': (f'EMA {MACD_SLOW}', dict(color='slateblue', linewidth=1)),
+    'Stoch_K': ('%K', dict(color='darkcyan')),
+    'Stoch_D': ('%D', dict(color='darkred', linestyle='--')),
+}
+HIDDEN_COLUMNS = {'BB_Std', 'SMA_Cross', 'EMA_Cross'}
+
+def calculate_macd(data, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    cache = FrameCache(data)
+    macd = cache.ewm(fast) - cache.ewm(slow)
+    return macd, macd.ewm(span=signal, adjust=False).mean()
+
+def calculate_rsi(data, period=RSI_PERIOD):
+    """Wilder RSI, as on most charting platforms"""
+    cache = FrameCache(data)
+    avg_gain = cache.wilder('gain', period)
+    avg_loss = cache.wilder('loss', period)
+    return 100 - (100 / (1 + avg_gain / avg_loss))
 
 def generate_signals(data):
-    buy = []
-    sell = []
-    flag = -1
-    for i in range(len(data)):
-        if data['MACD'].iloc[i] > data['Signal'].iloc[i] and data['RSI'].iloc[i] < 70:
-            if flag != 1:
-                buy.append(data['Close'].iloc[i])
-                sell.append(np.nan)
-                flag = 1
-            else:
-                buy.append(np.nan)
-                sell.append(np.nan)
-        elif data['MACD'].iloc[i] < data['Signal'].iloc[i] and data['RSI'].iloc[i] > 30:
-            if flag != 0:
-                buy.append(np.nan)
-                sell.append(data['Close'].iloc[i])
-                flag = 0
-            else:
-                buy.append(np.nan)
-                sell.append(np.nan)
-        else:
-            buy.append(np.nan)
-            sell.append(np.nan)
-    return buy, sell
+    return crossover_signals(data)
 
-def show_chart(ticker):
+def compute_chart_data(ticker, period="3mo", indicators=None):
+    """Bars with MACD, RSI, Buy/Sell signals, Bollinger Bands and any extra registered indicators"""
+    data = cached_history(ticker, period=period)
+    if data.empty:
+        return data
+    data = compute_indicators(data, DEFAULT_INDICATORS + [name for name in (indicators or []) if name not in DEFAULT_INDICATORS])
+    cache_indicators(ticker, data, zones=support_resistance(data))
+    return data
+
+def _plot_lines(ax, data, columns):
+    for column in columns:
+        if column in HIDDEN_COLUMNS or column not in data:
+            continue
+        label, style = LINE_STYLES.get(column, (column, {}))
+        ax.plot(data.index, data[column], label=label, **style)
+
+def show_chart(ticker, batch=None, data=None, insight=None, max_points=CHART_WIDTH_PX):
+    """Draw the chart panels and queue (or show) the AI insight; returns the plotted frame"""
     try:
-        # Fetch 3-month historical stock data for better indicator calculation
-        data = yf.Ticker(ticker).history(period="3mo")
+        selected = st.multiselect(
+            "Indicators:",
+            SELECTABLE,
+            default=CHART_DEFAULTS,
+            key="chart_indicators",
+            format_func=lambda name: INDICATORS[name].title,
+        )
+
+        # Fetch 3-month historical stock data for better indicator calculation,
+        # unless the caller (e.g. the analysis service client) already has it
+        if data is None:
+            data = compute_chart_data(ticker, period="3mo", indicators=selected)
         if data.empty:
             st.warning("No data found. Please check the symbol or try a different one.")
             return
+        if data.attrs.get('reduced_from'):
+            # An already downsampled frame (e.g. /indicators?max_points=) skips bars, so
+            # indicators, zones and candle patterns cannot be recomputed from it
+            missing = [name for name in selected if any(column not in data for column in INDICATORS[name].columns)]
+            if missing:
+                st.info(f"Not in the downsampled data: {', '.join(INDICATORS[name].title for name in missing)}")
+            selected = [name for name in selected if name not in missing]
+            zones = pd.DataFrame(columns=['kind', 'low', 'high'])
+            candles = pd.DataFrame(False, index=data.index,
+                                   columns=['Hammer', 'Bullish_Engulfing', 'Shooting_Star', 'Bearish_Engulfing'])
+        else:
+            # Fill in anything selected that the precomputed frame lacks (only the missing ones run)
+            data = compute_indicators(data, DEFAULT_INDICATORS + selected)
 
-        # Calculate indicators
-        data['MACD'], data['Signal'] = calculate_macd(data)
-        data['RSI'] = calculate_rsi(data)
-        data['Buy'], data['Sell'] = generate_signals(data)
-
-        # Bollinger Bands
-        data['BB_Middle'] = data['Close'].rolling(window=20).mean()
-        data['BB_Std'] = data['Close'].rolling(window=20).std()
-        data['BB_Upper'] = data['BB_Middle'] + (2 * data['BB_Std'])
-        data['BB_Lower'] = data['BB_Middle'] - (2 * data['BB_Std'])
+            # Support/resistance zones and candlestick patterns (from every bar)
+            zones = support_resistance(data)
+            candles = candlestick_patterns(data)
+        # Lines are drawn from at most ~max_points LTTB points; markers stay on their exact bars
+        lines, bars, volume = downsample_chart(data, max_points)
+        reduced = lines is not data
+        overlays = [INDICATORS[name] for name in selected if INDICATORS[name].panel is None]
+        panels = [INDICATORS[name] for name in selected if INDICATORS[name].panel is not None]
 
-        # 1. Price with Buy/Sell and Bollinger Bands
+        # 1. Price with Buy/Sell signals and the selected overlays
         fig1, ax1 = plt.subplots(figsize=(14, 5))
-        ax1.plot(data.index, data['Close'], label='Close Price', color='blue')
-        ax1.plot(data.index, data['BB_Upper'], label='Bollinger Upper', color='magenta', linestyle='--', linewidth=1)
-        ax1.plot(data.index, data['BB_Middle'], label='Bollinger Middle', color='black', linestyle='--', linewidth=1)
-        ax1.plot(data.index, data['BB_Lower'], label='Bollinger Lower', color='magenta', linestyle='--', linewidth=1)
+        ax1.plot(lines.index, lines['Close'], label='Close Price', color='blue')
+        if reduced:
+            ax1.fill_between(bars.index, bars['Low'], bars['High'], color='blue', alpha=0.1, step='post', label='High-Low Range')
+        for indicator in overlays:
+            _plot_lines(ax1, lines, indicator.columns)
+        for name in ('SMA_Cross', 'EMA_Cross'):
+            if name in selected:
+                fast = INDICATORS[name].columns[0]
+                ax1.scatter(data.index[data[name] > 0], data[fast][data[name] > 0], marker='o', color='gold', edgecolors='black', s=40, label=f"{INDICATORS[name].title} Golden Cross")
+                ax1.scatter(data.index[data[name] < 0], data[fast][data[name] < 0], marker='o', color='black', s=40, label=f"{INDICATORS[name].title} Death Cross")
         ax1.scatter(data.index, data['Buy'], label='Buy Signal', marker='^', color='green', s=100)
         ax1.scatter(data.index, data['Sell'], label='Sell Signal', marker='v', color='red', s=100)
-        ax1.set_title(f"{ticker} - Price, Bollinger Bands & Buy/Sell Signals")
+        for kind, color in (('support', 'green'), ('resistance', 'red')):
+            for i, zone in enumerate(zones[zones['kind'] == kind].head(2).itertuples()):
+                ax1.axhspan(zone.low, zone.high, color=color, alpha=0.12,
+                            label=f"{kind.capitalize()} Zone" if i == 0 else None)
+        bullish = candles['Hammer'] | candles['Bullish_Engulfing']
+        bearish = candles['Shooting_Star'] | candles['Bearish_Engulfing']
+        ax1.scatter(data.index[bullish], data['Low'][bullish] * 0.99, label='Bullish Candle', marker='P', color='green', s=30, alpha=0.6)
+        ax1.scatter(data.index[bearish], data['High'][bearish] * 1.01, label='Bearish Candle', marker='X', color='red', s=30, alpha=0.6)
+        ax1.set_title(f"{ticker} - Price, {', '.join(i.title for i in overlays) + ', ' if overlays else ''}Support/Resistance & Buy/Sell Signals")
         ax1.set_ylabel("Price")
         ax1.legend()
         ax1.grid(True)
         st.pyplot(fig1)
+        plt.close(fig1)
+
+        # 2. One panel per selected oscillator (MACD, RSI, ATR, Stochastic)
+        for indicator in panels:
+            fig, ax = plt.subplots(figsize=(14, 3))
+            _plot_lines(ax, lines, indicator.columns)
+            for level, color in zip(indicator.levels, ('green', 'red')):
+                ax.axhline(level, color=color, linestyle='--', linewidth=1)
+            ax.set_title(indicator.title)
+            ax.legend()
+            ax.grid(True)
+            st.pyplot(fig)
+            plt.close(fig)
 
-        # 2. MACD
-        fig2, ax2 = plt.subplots(figsize=(14, 3))
-        ax2.plot(data.index, data['MACD'], label='MACD', color='purple')
-        ax2.plot(data.index, data['Signal'], label='Signal Line', color='orange')
-        ax2.set_title("MACD")
-        ax2.legend()
-        ax2.grid(True)
-        st.pyplot(fig2)
-
-        # 3. RSI
-        fig3, ax3 = plt.subplots(figsize=(14, 3))
-        ax3.plot(data.index, data['RSI'], label='RSI', color='brown')
-        ax3.axhline(70, color='red', linestyle='--', linewidth=1)
-        ax3.axhline(30, color='green', linestyle='--', linewidth=1)
-        ax3.set_title("RSI (14)")
-        ax3.set_ylabel("RSI")
-        ax3.legend()
-        ax3.grid(True)
-        st.pyplot(fig3)
-
-        # 4. Volume
+        # 3. Volume
         fig4, ax4 = plt.subplots(figsize=(14, 2.5))
-        ax4.bar(data.index, data['Volume'], color='grey', label='Volume')
+        ax4.bar(volume.index, volume['Volume'], width=bar_width(volume.index), color='grey', label='Volume')
         ax4.set_title("Volume")
         ax4.set_ylabel("Volume")
         ax4.legend()
         ax4.grid(True)
         st.pyplot(fig4)
+        plt.close(fig4)
+        if reduced:
+            st.caption(f"Lines drawn from {len(lines):,} of {len(data):,} bars; volume shows the busiest bar of each of {len(volume):,} buckets")
+        elif data.attrs.get('reduced_from'):
+            st.caption(f"Drawn from {len(data):,} of {data.attrs['reduced_from']:,} bars downsampled by the analysis service")
 
                 # Show table of last few values
-        st.dataframe(data[['Close', 'MACD', 'Signal', 'RSI', 'BB_Upper', 'BB_Middle', 'BB_Lower', 'Volume']].tail())
+        table = ['Close'] + [c for i in selected for c in INDICATORS[i].columns if c not in HIDDEN_COLUMNS] + ['Volume']
+        st.dataframe(data[list(dict.fromkeys(table))].tail())
 
         # Generate and display AI insights
         st.subheader("🧠 AI Insights from Chart")
+        if insight is not None:
+            # Saved insight, e.g. from a snapshot
+            st.info(insight)
+            return data
+        insight_prompt = f"Give a short, clear insight on the latest price, {', '.join(INDICATORS[i].title for i in selected) or 'MACD, RSI'} and volume."
+        if batch is not None:
+            # Answered later together with the page's other AI tasks
+            slot = st.empty()
+            slot.caption("🧠 Generating insights...")
+            batch.add("chart_insight", insight_prompt, short=True, render=slot.info)
+            return data
         with st.spinner("Generating insights..."):
-            latest = data.tail(1)
-            context = (
-                f"Latest close: {latest['Close'].values[0]:.2f}, "
-                f"MACD: {latest['MACD'].values[0]:.2f}, "
-                f"RSI: {latest['RSI'].values[0]:.2f}, "
-                f"Bollinger Upper: {latest['BB_Upper'].values[0]:.2f}, "
-                f"Bollinger Lower: {latest['BB_Lower'].values[0]:.2f}, "
-                f"Volume: {latest['Volume'].values[0]:.0f}"
-            )
-            insight = get_bot_response(
-                f"Give a short, clear insight for the following stock chart data: {context}", 
-                stock=ticker
-            )
+            insight = get_bot_response(insight_prompt, stock=ticker, max_tokens=INSIGHT_MAX_TOKENS)
         st.info(insight)
+        return data
 
     except Exception as e:
         st.error(f"Error fetching or plotting stock data: {e}")
\ No newline at end of file
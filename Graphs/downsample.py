@@ -0,0 +1,223 @@
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Roughly the pixel width of the 14-inch, 100 dpi chart figures; one point per pixel is enough
+CHART_WIDTH_PX = 1400
+# Volume bars and the high/low envelope get one bucket per this many pixels
+BAR_PX = 4
+# Rows that carry a marker and must survive downsampling at their exact time and price
+MARKER_COLUMNS = ['Buy', 'Sell', 'SMA_Cross', 'EMA_Cross']
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+# Schema metadata key carrying frame.attrs (e.g. reduced_from) through Arrow streams
+ATTRS_KEY = b'stockbot.attrs'
+
+
+def lttb_indices(y, n_out, x=None):
+    """Largest-Triangle-Three-Buckets: positions of n_out points that keep a line's shape
+
+    The first and last points are always kept; every bucket in between keeps the point
+    forming the largest triangle with the previously kept point and the next bucket's mean.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    # NaN warm-up values (e.g. the first 19 bars of a 20-bar mean) would poison the areas
+    y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Mean point of every bucket (plus the last point as the final "next bucket"), computed once
+    counts = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / counts
+    mean_y = np.add.reduceat(y, edges) / counts
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        px, py = x[previous], y[previous]
+        area = np.abs((px - mean_x[bucket + 1]) * (y[start:end] - py) - (px - x[start:end]) * (mean_y[bucket + 1] - py))
+        previous = start + int(area.argmax())
+        picked[bucket + 1] = previous
+    return picked
+
+
+def _bucket_starts(n, n_buckets):
+    return np.unique(np.linspace(0, n, n_buckets, endpoint=False).astype(np.int64))
+
+
+def ohlc_buckets(data, n_buckets):
+    """Open/High/Low/Close/Volume per bucket of consecutive bars: first, max, min, last, sum
+
+    Each bucket is one coarser candle, so its volume is the volume traded over its bars.
+    """
+    n = len(data)
+    if n_buckets >= n:
+        return data[[c for c in ('Open', 'High', 'Low', 'Close', 'Volume') if c in data]].copy()
+    starts = _bucket_starts(n, n_buckets)
+    ends = np.concatenate([starts[1:], [n]]) - 1
+    buckets = {
+        'Open': data['Open'].to_numpy(dtype=float)[starts],
+        'High': np.maximum.reduceat(data['High'].to_numpy(dtype=float), starts),
+        'Low': np.minimum.reduceat(data['Low'].to_numpy(dtype=float), starts),
+        'Close': data['Close'].to_numpy(dtype=float)[ends],
+    }
+    if 'Volume' in data:
+        # Summed, so bucket volumes add up to exactly the traded volume
+        buckets['Volume'] = np.add.reduceat(data['Volume'].to_numpy(dtype=float), starts)
+    return pd.DataFrame(buckets, index=data.index[starts])
+
+
+def volume_peaks(data, n_buckets):
+    """Volume of the highest-volume bar in each bucket of consecutive bars, at that bar's time
+
+    Every value is a real bar's volume, and the tallest bars are always kept.
+    """
+    n = len(data)
+    if n_buckets >= n:
+        return data[['Volume']].copy()
+    starts = _bucket_starts(n, n_buckets)
+    volume = np.nan_to_num(data['Volume'].to_numpy(dtype=float), nan=-np.inf)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    hits = np.flatnonzero(volume == np.maximum.reduceat(volume, starts)[bucket])
+    # First bar reaching the bucket's peak
+    peaks = hits[np.unique(bucket[hits], return_index=True)[1]]
+    return data.iloc[peaks][['Volume']]
+
+
+def marker_rows(data):
+    """Positions of bars carrying a buy/sell signal or a moving-average cross"""
+    mask = np.zeros(len(data), dtype=bool)
+    for column in MARKER_COLUMNS:
+        if column in data:
+            values = data[column].to_numpy(dtype=float)
+            mask |= (~np.isnan(values) & (values != 0)) if column.endswith('_Cross') else ~np.isnan(values)
+    return np.flatnonzero(mask)
+
+
+def downsample_chart(data, max_points=CHART_WIDTH_PX):
+    """Reduced (lines, bars, volume) frames for plotting data at about max_points across
+
+    lines keeps the LTTB points of Close plus every marker row, with every column exact at
+    those rows. bars holds OHLC buckets (one per BAR_PX pixels) for the high/low envelope,
+    and volume the highest-volume bar of each bucket with its real volume. Frames that
+    already fit are returned as they are.
+    """
+    if len(data) <= max_points:
+        return data, data, data
+    keep = np.union1d(lttb_indices(data['Close'].to_numpy(dtype=float), max_points), marker_rows(data))
+    n_buckets = max(max_points // BAR_PX, 1)
+    volume = volume_peaks(data, n_buckets) if 'Volume' in data else data.iloc[:0]
+    lines = data.iloc[keep].copy()
+    # Rows are no longer consecutive bars; indicators and candle patterns must not be recomputed on them
+    lines.attrs['reduced_from'] = len(data)
+    return lines, ohlc_buckets(data, n_buckets), volume
+
+
+def bar_width(index):
+    """Bar width (in days, Matplotlib's date unit) that fills the typical gap between rows"""
+    if len(index) < 2 or not isinstance(index, pd.DatetimeIndex):
+        return 0.8
+    gaps = np.diff(index.to_numpy()) / np.timedelta64(1, 'D')
+    return float(np.median(gaps)) * 0.8
+
+
+def to_arrow(frame, compression='zstd'):
+    """Frame (with its index) as compressed Arrow IPC stream bytes"""
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    if frame.attrs:
+        metadata = dict(table.schema.metadata or {})
+        metadata[ATTRS_KEY] = json.dumps(frame.attrs, default=str).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+    sink = io.BytesIO()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def from_arrow(payload):
+    """Frame back from to_arrow bytes, attrs included"""
+    table = pa.ipc.open_stream(payload).read_all()
+    frame = table.to_pandas()
+    attrs = (table.schema.metadata or {}).get(ATTRS_KEY)
+    if attrs:
+        frame.attrs.update(json.loads(attrs))
+    return frame
+
+
+def _render(lines, bars, volume, reduced):
+    """Price + volume figures drawn the way show_chart draws them; PNG bytes"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 7.5), gridspec_kw={'height_ratios': [2, 1]})
+    ax1.plot(lines.index, lines['Close'], color='blue')
+    if reduced:
+        ax1.fill_between(bars.index, bars['Low'], bars['High'], color='blue', alpha=0.1, step='post')
+    for column in ('BB_Upper', 'BB_Middle', 'BB_Lower'):
+        ax1.plot(lines.index, lines[column], linestyle='--', linewidth=1)
+    ax1.scatter(lines.index, lines['Buy'], marker='^', color='green', s=100)
+    ax1.scatter(lines.index, lines['Sell'], marker='v', color='red', s=100)
+    ax2.bar(volume.index, volume['Volume'], width=bar_width(volume.index), color='grey')
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _time(function, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(max_points=CHART_WIDTH_PX):
+    """Payload size and render time of full vs downsampled chart data"""
+    from Providers.providers import synthetic_bars
+    from Graphs.indicators import compute_indicators, DEFAULT_INDICATORS
+
+    cases = {
+        '3mo daily': ('3mo', '1d'),
+        '10y daily': ('10y', '1d'),
+        '60d x 5m intraday': ('3mo', '5m'),
+        '7d x 1m intraday': ('1mo', '1m'),
+    }
+    results = {}
+    print(f"{'case':<20}{'bars':>7}{'kept':>7}{'json KB':>10}{'arrow KB':>10}{'reduced KB':>12}"
+          f"{'reduce ms':>11}{'render ms':>11}{'reduced ms':>12}")
+    for name, (period, interval) in cases.items():
+        data = compute_indicators(synthetic_bars('BENCH', period, interval), DEFAULT_INDICATORS)
+        reduce_time, (lines, bars, volume) = _time(lambda: downsample_chart(data, max_points))
+        row = {
+            'bars': len(data),
+            'kept': len(lines),
+            'json_bytes': len(json.dumps(json.loads(data.to_json(orient='split', date_format='iso', double_precision=10)))),
+            'arrow_bytes': len(to_arrow(data)),
+            'reduced_arrow_bytes': len(to_arrow(lines)) + (len(to_arrow(bars)) if bars is not lines else 0),
+            'reduce_ms': reduce_time * 1000,
+            'render_ms': _time(lambda: _render(data, data, data, False), repeat=2)[0] * 1000,
+            'reduced_render_ms': _time(lambda: _render(lines, bars, volume, len(lines) < len(data)), repeat=2)[0] * 1000,
+        }
+        results[name] = row
+        print(f"{name:<20}{row['bars']:>7}{row['kept']:>7}{row['json_bytes'] / 1024:>10.1f}{row['arrow_bytes'] / 1024:>10.1f}"
+              f"{row['reduced_arrow_bytes'] / 1024:>12.1f}{row['reduce_ms']:>11.2f}{row['render_ms']:>11.1f}{row['reduced_render_ms']:>12.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chart downsampling and transport benchmark")
+    parser.add_argument("--max-points", type=int, default=CHART_WIDTH_PX)
+    args = parser.parse_args()
+    benchmark(args.max_points)
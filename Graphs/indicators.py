@@ -0,0 +1,285 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# Indicator parameters shared by the charts and the alert engine
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+BB_WINDOW = 20
+BB_STD = 2
+ATR_PERIOD = 14
+STOCH_PERIOD = 14
+STOCH_SMOOTH = 3
+SMA_FAST = 20
+SMA_SLOW = 50
+
+
+class FrameCache:
+    """Memoised intermediates for one OHLCV frame
+
+    Indicators ask for diffs, rolling windows and EWMs through this object, so a
+    20-bar mean or a 12-span EWM is computed once per frame however many indicators use it.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._memo = {}
+        self.hits = 0
+
+    def _get(self, key, compute):
+        if key in self._memo:
+            self.hits += 1
+        else:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def diff(self, column='Close'):
+        return self._get(('diff', column), lambda: self.data[column].diff())
+
+    def shift(self, column='Close'):
+        return self._get(('shift', column), lambda: self.data[column].shift())
+
+    def sma(self, window, column='Close'):
+        return self._get(('sma', column, window), lambda: self.data[column].rolling(window).mean())
+
+    def std(self, window, column='Close'):
+        return self._get(('std', column, window), lambda: self.data[column].rolling(window).std())
+
+    def rolling_min(self, window, column='Low'):
+        return self._get(('min', column, window), lambda: self.data[column].rolling(window).min())
+
+    def rolling_max(self, window, column='High'):
+        return self._get(('max', column, window), lambda: self.data[column].rolling(window).max())
+
+    def ewm(self, span, column='Close'):
+        return self._get(('ewm', column, span), lambda: self.data[column].ewm(span=span, adjust=False).mean())
+
+    def gain(self):
+        return self._get(('gain',), lambda: self.diff().clip(lower=0))
+
+    def loss(self):
+        return self._get(('loss',), lambda: (-self.diff()).clip(lower=0))
+
+    def true_range(self):
+        def compute():
+            high = self.data['High'].to_numpy(dtype=float)
+            low = self.data['Low'].to_numpy(dtype=float)
+            previous = self.shift('Close').to_numpy(dtype=float)
+            ranges = np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+            return pd.Series(ranges, index=self.data.index)
+        return self._get(('true_range',), compute)
+
+    def wilder(self, name, period):
+        """Wilder smoothing of a named intermediate (gain, loss, true_range)"""
+        return self._get(('wilder', name, period), lambda: wilder_smooth(getattr(self, name)(), period))
+
+
+def wilder_smooth(series, period):
+    """Wilder's moving average: seeded with the mean of the first period values, then alpha = 1/period"""
+    values = series.to_numpy(dtype=float)
+    seeded = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid):
+        seed = valid[0] + period - 1
+        if seed < len(values):
+            seeded[seed] = values[valid[0]:seed + 1].mean()
+            seeded[seed + 1:] = values[seed + 1:]
+    # One pass in pandas' C EWM loop; leading NaNs are skipped so the seed starts the recursion
+    return pd.Series(seeded, index=series.index).ewm(alpha=1.0 / period, adjust=False).mean()
+
+
+class Indicator:
+    """A registered indicator: output columns, required input columns and indicator dependencies"""
+
+    def __init__(self, name, columns, compute, inputs=('Close',), requires=(), panel=None, title=None, levels=()):
+        self.name = name
+        self.columns = list(columns)
+        self.compute = compute
+        self.inputs = tuple(inputs)
+        self.requires = tuple(requires)
+        # None draws on the price chart; otherwise the indicator gets its own panel
+        self.panel = panel
+        self.title = title or name
+        self.levels = tuple(levels)
+
+
+INDICATORS = {}
+
+
+def register(name, columns, inputs=('Close',), requires=(), panel=None, title=None, levels=()):
+    """Decorator adding compute(cache) -> {column: series} to the registry"""
+    def wrap(compute):
+        INDICATORS[name] = Indicator(name, columns, compute, inputs, requires, panel, title, levels)
+        return compute
+    return wrap
+
+
+@register('MACD', ['MACD', 'Signal'], panel='MACD')
+def _macd(cache):
+    macd = cache.ewm(MACD_FAST) - cache.ewm(MACD_SLOW)
+    return {'MACD': macd, 'Signal': macd.ewm(span=MACD_SIGNAL, adjust=False).mean()}
+
+
+@register('RSI', ['RSI'], panel='RSI', title=f'RSI ({RSI_PERIOD}, Wilder)', levels=(30, 70))
+def _rsi(cache):
+    avg_gain = cache.wilder('gain', RSI_PERIOD)
+    avg_loss = cache.wilder('loss', RSI_PERIOD)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {'RSI': 100 - 100 / (1 + avg_gain / avg_loss)}
+
+
+@register('Bollinger', ['BB_Middle', 'BB_Std', 'BB_Upper', 'BB_Lower'], title=f'Bollinger Bands ({BB_WINDOW}, {BB_STD})')
+def _bollinger(cache):
+    middle = cache.sma(BB_WINDOW)
+    std = cache.std(BB_WINDOW)
+    return {'BB_Middle': middle, 'BB_Std': std, 'BB_Upper': middle + BB_STD * std, 'BB_Lower': middle - BB_STD * std}
+
+
+@register('Signals', ['Buy', 'Sell'], requires=('MACD', 'RSI'))
+def _signals(cache):
+    return dict(zip(('Buy', 'Sell'), crossover_signals(cache.data)))
+
+
+@register('ATR', ['ATR'], inputs=('High', 'Low', 'Close'), panel='ATR', title=f'ATR ({ATR_PERIOD})')
+def _atr(cache):
+    return {'ATR': cache.wilder('true_range', ATR_PERIOD)}
+
+
+@register('VWAP', ['VWAP'], inputs=('High', 'Low', 'Close', 'Volume'))
+def _vwap(cache):
+    data = cache.data
+    typical = (data['High'] + data['Low'] + data['Close']) / 3
+    weighted = typical * data['Volume']
+    dates = data.index.normalize() if isinstance(data.index, pd.DatetimeIndex) else None
+    if dates is not None and dates.nunique() < len(dates):
+        # Intraday bars: anchor to each session
+        cumulative_pv = weighted.groupby(dates).cumsum()
+        cumulative_volume = data['Volume'].groupby(dates).cumsum()
+    else:
+        cumulative_pv = weighted.cumsum()
+        cumulative_volume = data['Volume'].cumsum()
+    return {'VWAP': cumulative_pv / cumulative_volume.replace(0, np.nan)}
+
+
+def _cross(fast, slow):
+    """+1 on the bar fast crosses above slow, -1 on a cross below, else 0"""
+    above = (fast > slow).astype(np.int8)
+    valid = fast.notna() & slow.notna() & fast.shift().notna() & slow.shift().notna()
+    return above.diff().fillna(0).where(valid, 0).astype(np.int8)
+
+
+@register('SMA_Cross', [f'SMA_{SMA_FAST}', f'SMA_{SMA_SLOW}', 'SMA_Cross'], title=f'SMA {SMA_FAST}/{SMA_SLOW}')
+def _sma_cross(cache):
+    fast, slow = cache.sma(SMA_FAST), cache.sma(SMA_SLOW)
+    return {f'SMA_{SMA_FAST}': fast, f'SMA_{SMA_SLOW}': slow, 'SMA_Cross': _cross(fast, slow)}
+
+
+@register('EMA_Cross', [f'EMA_{MACD_FAST}', f'EMA_{MACD_SLOW}', 'EMA_Cross'], title=f'EMA {MACD_FAST}/{MACD_SLOW}')
+def _ema_cross(cache):
+    # Same spans as MACD, so the EWMs are shared with it
+    fast, slow = cache.ewm(MACD_FAST), cache.ewm(MACD_SLOW)
+    return {f'EMA_{MACD_FAST}': fast, f'EMA_{MACD_SLOW}': slow, 'EMA_Cross': _cross(fast, slow)}
+
+
+@register('Stochastic', ['Stoch_K', 'Stoch_D'], inputs=('High', 'Low', 'Close'), panel='Stochastic',
+          title=f'Stochastic ({STOCH_PERIOD}, {STOCH_SMOOTH})', levels=(20, 80))
+def _stochastic(cache):
+    low = cache.rolling_min(STOCH_PERIOD)
+    high = cache.rolling_max(STOCH_PERIOD)
+    k = (cache.data['Close'] - low) / (high - low).replace(0, np.nan) * 100
+    return {'Stoch_K': k, 'Stoch_D': k.rolling(STOCH_SMOOTH).mean()}
+
+
+def crossover_signals(data):
+    """Buy when MACD is above its signal with RSI < 70, sell when below with RSI > 30
+
+    A signal fires only when the side changes; bars matching neither condition keep the
+    previous side.
+    """
+    macd, signal, rsi, close = (data[column].to_numpy(dtype=float) for column in ('MACD', 'Signal', 'RSI', 'Close'))
+    with np.errstate(invalid='ignore'):
+        bullish = (macd > signal) & (rsi < 70)
+        bearish = ~bullish & (macd < signal) & (rsi > 30)
+    active = bullish | bearish
+    # Side of the last active bar at or before each bar (-1 before the first one)
+    last = np.maximum.accumulate(np.where(active, np.arange(len(close)), -1))
+    side = np.where(last >= 0, bullish[np.maximum(last, 0)], -1).astype(np.int8)
+    previous = np.concatenate([[-1], side[:-1]])
+    fired = active & (side != previous)
+    return np.where(fired & bullish, close, np.nan).tolist(), np.where(fired & bearish, close, np.nan).tolist()
+
+
+DEFAULT_INDICATORS = ['MACD', 'RSI', 'Bollinger', 'Signals']
+# Indicators a user can toggle on the chart
+SELECTABLE = ['Bollinger', 'MACD', 'RSI', 'ATR', 'VWAP', 'SMA_Cross', 'EMA_Cross', 'Stochastic']
+
+
+def resolve(names):
+    """Registered indicators for names plus their dependencies, dependencies first"""
+    ordered = []
+    visiting = set()
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator {name!r}; choose from {', '.join(INDICATORS)}")
+        if name in visiting:
+            raise ValueError(f"Indicator dependency cycle at {name!r}")
+        visiting.add(name)
+        for dependency in INDICATORS[name].requires:
+            visit(dependency)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return [INDICATORS[name] for name in ordered]
+
+
+def compute_indicators(data, names=DEFAULT_INDICATORS, cache=None):
+    """Copy of data with the columns of every requested indicator (and its dependencies)"""
+    data = data.copy()
+    if data.empty:
+        return data
+    cache = cache or FrameCache(data)
+    cache.data = data
+    for indicator in resolve(names):
+        missing = [column for column in indicator.inputs if column not in data]
+        if missing:
+            raise ValueError(f"{indicator.name} needs columns {missing}")
+        if all(column in data for column in indicator.columns):
+            continue
+        for column, values in indicator.compute(cache).items():
+            data[column] = values
+    return data
+
+
+def _time(function, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark():
+    """Time the registry with shared intermediates against independent per-indicator passes"""
+    from Providers.providers import synthetic_bars
+
+    for name, data in (('10y daily', synthetic_bars('BENCH', '10y', '1d')),
+                       ('60d x 5m intraday', synthetic_bars('BENCH', '3mo', '5m'))):
+        shared = _time(lambda: compute_indicators(data, SELECTABLE + ['Signals']))
+        separate = _time(lambda: [compute_indicators(data, [name]) for name in SELECTABLE + ['Signals']])
+        print(f"{name:<20} {len(data):>7} bars  shared {shared * 1000:7.2f} ms  separate {separate * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indicator registry benchmark")
+    parser.parse_args()
+    benchmark()
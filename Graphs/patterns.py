@@ -0,0 +1,185 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from Providers.providers import cached_history, synthetic_bars
+
+SWING_ORDER = 5
+ZONE_TOLERANCE = 0.01
+MIN_TOUCHES = 2
+
+
+def find_swings(high, low, order=SWING_ORDER):
+    """Boolean masks of swing highs/lows: the extreme of a window of order bars on each side"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    n = len(high)
+    swing_high = np.zeros(n, dtype=bool)
+    swing_low = np.zeros(n, dtype=bool)
+    width = 2 * order + 1
+    if n < width:
+        return swing_high, swing_low
+    centre = slice(order, n - order)
+    swing_high[centre] = high[centre] >= sliding_window_view(high, width).max(axis=1)
+    swing_low[centre] = low[centre] <= sliding_window_view(low, width).min(axis=1)
+    return swing_high, swing_low
+
+
+def _cluster(prices, tolerance, min_touches):
+    prices = np.sort(prices[~np.isnan(prices)])
+    if not len(prices):
+        empty = np.zeros(0)
+        return empty, empty, empty, np.zeros(0, dtype=np.int64)
+    gaps = np.diff(prices) / prices[:-1]
+    starts = np.concatenate([[0], np.flatnonzero(gaps > tolerance) + 1])
+    ends = np.concatenate([starts[1:], [len(prices)]])
+    touches = ends - starts
+    keep = touches >= min_touches
+    level = np.add.reduceat(prices, starts) / touches
+    return prices[starts][keep], prices[ends - 1][keep], level[keep], touches[keep]
+
+
+def cluster_levels(prices, tolerance=ZONE_TOLERANCE, min_touches=MIN_TOUCHES):
+    """Group nearby swing prices into zones; a new zone starts after a gap wider than tolerance"""
+    low, high, level, touches = _cluster(np.asarray(prices, dtype=float), tolerance, min_touches)
+    return pd.DataFrame({'low': low, 'high': high, 'level': level, 'touches': touches})
+
+
+def _zones(high, low, close, order, tolerance, min_touches):
+    swing_high, swing_low = find_swings(high, low, order)
+    zone_low, zone_high, level, touches = _cluster(
+        np.concatenate([high[swing_high], low[swing_low]]), tolerance, min_touches)
+    distance = (level / close - 1) * 100
+    nearest = np.argsort(np.abs(distance), kind='stable')
+    return zone_low[nearest], zone_high[nearest], level[nearest], touches[nearest], distance[nearest]
+
+
+def support_resistance(data, order=SWING_ORDER, tolerance=ZONE_TOLERANCE, min_touches=MIN_TOUCHES):
+    """Support and resistance zones from clustered swing highs and lows, nearest to the last close first"""
+    zone_low, zone_high, level, touches, distance = _zones(
+        data['High'].to_numpy(dtype=float), data['Low'].to_numpy(dtype=float),
+        float(data['Close'].iloc[-1]), order, tolerance, min_touches)
+    return pd.DataFrame({
+        'low': zone_low,
+        'high': zone_high,
+        'level': level,
+        'touches': touches,
+        'kind': np.where(distance < 0, 'support', 'resistance'),
+        'distance_pct': distance,
+    })
+
+
+def _candles(o, h, l, c, doji_ratio):
+    body = c - o
+    size = np.abs(body)
+    span = h - l
+    upper = h - np.maximum(o, c)
+    lower = np.minimum(o, c) - l
+    prev_o = np.concatenate([[np.nan], o[:-1]])
+    prev_c = np.concatenate([[np.nan], c[:-1]])
+    prev_body = prev_c - prev_o
+
+    with np.errstate(invalid='ignore'):
+        small_body = (size > doji_ratio * span) & (size <= 0.35 * span)
+        return {
+            'Doji': (span > 0) & (size <= doji_ratio * span),
+            'Hammer': small_body & (lower >= 2 * size) & (upper <= size),
+            'Shooting_Star': small_body & (upper >= 2 * size) & (lower <= size),
+            'Bullish_Engulfing': (prev_body < 0) & (body > 0) & (o <= prev_c) & (c >= prev_o) & (size > np.abs(prev_body)),
+            'Bearish_Engulfing': (prev_body > 0) & (body < 0) & (o >= prev_c) & (c <= prev_o) & (size > np.abs(prev_body)),
+        }
+
+
+def _ohlc(data):
+    return tuple(data[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close'))
+
+
+def candlestick_patterns(data, doji_ratio=0.1):
+    """Flag doji, hammer, shooting star and bullish/bearish engulfing candles"""
+    return pd.DataFrame(_candles(*_ohlc(data), doji_ratio), index=data.index)
+
+
+def detect_patterns(data, order=SWING_ORDER, tolerance=ZONE_TOLERANCE):
+    """Swing points, support/resistance zones and candlestick flags for one OHLC frame"""
+    swing_high, swing_low = find_swings(data['High'], data['Low'], order)
+    return {
+        'swing_high': pd.Series(swing_high, index=data.index),
+        'swing_low': pd.Series(swing_low, index=data.index),
+        'zones': support_resistance(data, order, tolerance),
+        'candles': candlestick_patterns(data),
+    }
+
+
+def latest_signals(data, lookback=5, nearest=2):
+    """One-row summary: nearest zones and candle patterns in the last few bars"""
+    o, h, l, c = _ohlc(data)
+    zone_low, zone_high, _, _, distance = _zones(h, l, c[-1], SWING_ORDER, ZONE_TOLERANCE, MIN_TOUCHES)
+    # Only the last lookback bars (plus one for engulfing) matter here
+    tail = slice(-lookback - 1, None)
+    candles = _candles(o[tail], h[tail], l[tail], c[tail], 0.1)
+    row = {'close': float(c[-1])}
+    for kind, side in (('support', distance < 0), ('resistance', distance >= 0)):
+        picked = np.flatnonzero(side)[:nearest]
+        row[kind] = ", ".join(f"{zone_low[i]:.2f}-{zone_high[i]:.2f}" for i in picked) or None
+        row[f'{kind}_distance_pct'] = float(distance[picked[0]]) if len(picked) else np.nan
+    row['recent_patterns'] = ", ".join(name for name, mask in candles.items() if mask[1:].any()) or None
+    return row
+
+
+def scan_watchlist(symbols, period="1y", interval="1d", bars=None, max_workers=8):
+    """Latest support/resistance and candle patterns for every symbol, from cached bars"""
+    symbols = [s.strip().upper() for s in symbols]
+    if bars is None:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = pool.map(lambda s: cached_history(s, period=period, interval=interval), symbols)
+            bars = dict(zip(symbols, frames))
+    rows = {}
+    for symbol in symbols:
+        data = bars.get(symbol)
+        if data is None or data.empty:
+            continue
+        rows[symbol] = latest_signals(data)
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def _time(function, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(watchlist_size=100):
+    """Time detection on multi-year daily bars, intraday bars and a whole watchlist"""
+    cases = {
+        '10y daily': synthetic_bars('BENCH', '10y', '1d'),
+        '60d x 5m intraday': synthetic_bars('BENCH', '3mo', '5m'),
+        '7d x 1m intraday': synthetic_bars('BENCH', '1mo', '1m'),
+    }
+    results = {}
+    for name, data in cases.items():
+        results[name] = _time(lambda: detect_patterns(data))
+        print(f"{name:<22} {len(data):>7} bars  {results[name] * 1000:8.2f} ms")
+    bars = {f"SYM{i:03d}": synthetic_bars(f"SYM{i:03d}", '2y', '1d') for i in range(watchlist_size)}
+    results['watchlist'] = _time(lambda: scan_watchlist(list(bars), bars=bars), repeat=3)
+    print(f"{watchlist_size} symbols x 2y daily  {results['watchlist'] * 1000:8.2f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Support/resistance and candlestick pattern scanner")
+    parser.add_argument("symbols", nargs="*", help="Watchlist to scan")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+    if args.benchmark or not args.symbols:
+        benchmark()
+    else:
+        print(scan_watchlist(args.symbols, args.period, args.interval).to_string())
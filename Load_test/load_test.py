@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Simulated users must never reach the real services
+os.environ.setdefault("STOCKBOT_DATA_MODE", "replay")
+for key in ("FINNHUB_API_KEY", "NEWSAPI_KEY", "ALPHA_VANTAGE_API_KEY", "GROQ_API_KEY"):
+    os.environ.setdefault(key, "replay")
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app', 'app.py'))
+SYMBOLS = ["INFY.NS", "TCS.NS", "RELIANCE.NS", "HDFCBANK.NS", "WIPRO.NS", "AAPL", "MSFT", "GOOGL"]
+QUICK_QUESTIONS = ["📊 Market Sentiment", "📈 Technical Analysis", "💼 Fundamental Analysis", "⚠️ Risk Factors"]
+ANALYZE_BUTTON = "🚀 Get Professional Analysis"
+
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS is the best we can do without /proc (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _button(at, label):
+    for button in at.button:
+        if button.label == label:
+            return button
+    raise LookupError(f"Button not found: {label}")
+
+
+class SimulatedUser(threading.Thread):
+    """One browser session: pick a symbol, press a quick question, request analysis"""
+
+    def __init__(self, user_id, stop_at, results, timeout, think_time, seed=None):
+        super().__init__(name=f"user-{user_id}", daemon=True)
+        self.user_id = user_id
+        self.stop_at = stop_at
+        self.results = results
+        self.timeout = timeout
+        self.think_time = think_time
+        self.random = random.Random(seed)
+
+    def _timed(self, step, action):
+        start = time.perf_counter()
+        error = None
+        try:
+            at = action()
+            if at.exception:
+                error = str(at.exception[0].message)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.results.append({
+            'user': self.user_id,
+            'step': step,
+            'start': start,
+            'latency': time.perf_counter() - start,
+            'error': error,
+        })
+        return error is None
+
+    def run(self):
+        at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        if not self._timed('load', at.run):
+            return
+        while time.perf_counter() < self.stop_at:
+            symbol = self.random.choice(SYMBOLS)
+            question = self.random.choice(QUICK_QUESTIONS)
+            steps = [
+                ('symbol', lambda: at.text_input[0].set_value(symbol).run()),
+                ('quick_question', lambda: _button(at, question).click().run()),
+                ('analysis', lambda: _button(at, ANALYZE_BUTTON).click().run()),
+            ]
+            for step, action in steps:
+                if time.perf_counter() >= self.stop_at or not self._timed(step, action):
+                    break
+                if self.think_time:
+                    time.sleep(self.random.uniform(0, self.think_time))
+
+
+def sample_memory(stop_event, samples, start, interval):
+    """Record RSS and open Matplotlib figures until stop_event is set"""
+    while not stop_event.is_set():
+        samples.append({
+            'elapsed': time.perf_counter() - start,
+            'rss_mb': rss_mb(),
+            'open_figures': len(plt.get_fignums()),
+        })
+        stop_event.wait(interval)
+
+
+def run_load_test(users=10, duration=60, ramp_up=5, timeout=30, think_time=0.5, sample_interval=1.0, seed=0):
+    """Drive the app with concurrent simulated users and return a report dict"""
+    results = []
+    samples = []
+    start = time.perf_counter()
+    stop_at = start + duration
+    stop_event = threading.Event()
+    sampler = threading.Thread(target=sample_memory, args=(stop_event, samples, start, sample_interval), daemon=True)
+    sampler.start()
+
+    threads = []
+    for i in range(users):
+        thread = SimulatedUser(i, stop_at, results, timeout, think_time, seed=seed + i)
+        thread.start()
+        threads.append(thread)
+        if ramp_up and users > 1:
+            time.sleep(ramp_up / users)
+    for thread in threads:
+        thread.join(timeout=max(stop_at - time.perf_counter(), 0) + timeout * 3)
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    sampler.join()
+    return build_report(results, samples, users, elapsed)
+
+
+def build_report(results, samples, users, elapsed):
+    latencies = np.array([r['latency'] for r in results if not r['error']])
+    errors = [r for r in results if r['error']]
+    report = {
+        'users': users,
+        'elapsed_s': round(elapsed, 2),
+        'page_runs': len(results),
+        'errors': len(errors),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {},
+        'by_step': {},
+        'memory': samples,
+        'sample_errors': sorted({e['error'] for e in errors})[:5],
+    }
+    if len(latencies):
+        report['latency_ms'] = {
+            name: round(float(np.percentile(latencies, q)) * 1000, 1)
+            for name, q in (('p50', 50), ('p90', 90), ('p95', 95), ('p99', 99), ('max', 100))
+        }
+    for step in sorted({r['step'] for r in results}):
+        step_latencies = [r['latency'] for r in results if r['step'] == step and not r['error']]
+        if step_latencies:
+            report['by_step'][step] = {
+                'count': len(step_latencies),
+                'p50_ms': round(float(np.percentile(step_latencies, 50)) * 1000, 1),
+                'p95_ms': round(float(np.percentile(step_latencies, 95)) * 1000, 1),
+            }
+    if samples:
+        report['rss_start_mb'] = round(samples[0]['rss_mb'], 1)
+        report['rss_end_mb'] = round(samples[-1]['rss_mb'], 1)
+        report['rss_growth_mb_per_min'] = round(
+            (samples[-1]['rss_mb'] - samples[0]['rss_mb']) / max(samples[-1]['elapsed'], 1e-9) * 60, 2)
+        report['open_figures_max'] = max(s['open_figures'] for s in samples)
+    return report
+
+
+def print_report(report):
+    print(f"Users: {report['users']}  Duration: {report['elapsed_s']}s  "
+          f"Page runs: {report['page_runs']}  Errors: {report['errors']}")
+    print(f"Throughput: {report['throughput_rps']} page runs/s")
+    if report['latency_ms']:
+        print("Latency (ms): " + "  ".join(f"{k}={v}" for k, v in report['latency_ms'].items()))
+    for step, stats in report['by_step'].items():
+        print(f"  {step:<15} n={stats['count']:<5} p50={stats['p50_ms']}ms  p95={stats['p95_ms']}ms")
+    if 'rss_start_mb' in report:
+        print(f"RSS: {report['rss_start_mb']} MB -> {report['rss_end_mb']} MB "
+              f"({report['rss_growth_mb_per_min']} MB/min), peak open figures: {report['open_figures_max']}")
+    for error in report['sample_errors']:
+        print(f"  error: {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit app with simulated users")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds to start all users")
+    parser.add_argument("--timeout", type=float, default=30, help="Per page run timeout")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Max pause between actions")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--json", help="Write the full report (including memory samples) here")
+    args = parser.parse_args()
+    report = run_load_test(args.users, args.duration, args.ramp_up, args.timeout,
+                           args.think_time, args.sample_interval)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
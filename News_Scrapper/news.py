@@ -1,8 +1,9 @@
-import requests
 import os
 from dotenv import load_dotenv
-import yfinance as yf
-from datetime import datetime, timedelta
+from Providers.providers import get_provider
+from Chat_bot.context import cache_news
+from News_Scrapper.store import get_news_store
+from datetime import datetime, timedelta, timezone
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,12 +14,16 @@ class NewsAggregator:
         self.alpha_vantage_key = os.environ.get("ALPHA_VANTAGE_API_KEY")
         self.finnhub_key = os.environ.get("FINNHUB_API_KEY")
         self.newsapi_key = os.environ.get("NEWSAPI_KEY")
+        if get_provider().mode == 'replay':
+            # Recordings never contain keys, so replay works without any being configured
+            self.alpha_vantage_key = self.alpha_vantage_key or "replay"
+            self.finnhub_key = self.finnhub_key or "replay"
+            self.newsapi_key = self.newsapi_key or "replay"
         
     def get_company_name_from_symbol(self, symbol):
         """Extract company name from stock symbol using yfinance"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            info = get_provider().info(symbol)
             
             # Try different possible name fields
             company_name = (
@@ -33,8 +38,11 @@ class NewsAggregator:
             print(f"Error getting company name: {e}")
             return symbol.replace('.NS', '').replace('.BO', '')
 
-    def get_finnhub_news(self, symbol, company_name):
-        """Get news from Finnhub API - Very generous free tier"""
+    def get_finnhub_news(self, symbol, company_name, since=None):
+        """Get news from Finnhub API - Very generous free tier
+
+        With since (a UTC datetime cursor), only articles published after it are returned.
+        """
         if not self.finnhub_key:
             return []
             
@@ -45,9 +53,9 @@ class NewsAggregator:
             # Finnhub company news endpoint
             url = "https://finnhub.io/api/v1/company-news"
             
-            # Date range - last 30 days
+            # Date range - last 30 days, or from the cursor's day when polling incrementally
             to_date = datetime.now().strftime('%Y-%m-%d')
-            from_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            from_date = (since or datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
             
             params = {
                 'symbol': base_symbol,
@@ -56,12 +64,16 @@ class NewsAggregator:
                 'token': self.finnhub_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_provider().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
             news_articles = []
             
+            if since:
+                # Finnhub filters by day only, so drop what the cursor already covers
+                data = [a for a in data if _utc(a.get('datetime', 0)) > since]
+
             for article in data[:5]:  # Limit to 5 articles
                 title = article.get('headline', 'No Title')
                 source = article.get('source', 'Finnhub')
@@ -73,7 +85,9 @@ class NewsAggregator:
                     'source': source,
                     'summary': summary,
                     'url': url_link,
-                    'api': 'Finnhub'
+                    'api': 'Finnhub',
+                    'id': str(article.get('id') or url_link or title),
+                    'published': _iso(_utc(article['datetime'])) if article.get('datetime') else None
                 })
                 
             return news_articles
@@ -82,8 +96,8 @@ class NewsAggregator:
             print(f"Finnhub API error: {e}")
             return []
     
-    def get_alpha_vantage_news(self, symbol, company_name):
-        """Get news from Alpha Vantage API"""
+    def get_alpha_vantage_news(self, symbol, company_name, since=None):
+        """Get news from Alpha Vantage API, optionally only items published after since"""
         if not self.alpha_vantage_key:
             return []
             
@@ -95,8 +109,10 @@ class NewsAggregator:
                 'apikey': self.alpha_vantage_key,
                 'limit': 5
             }
+            if since:
+                params['time_from'] = since.strftime('%Y%m%dT%H%M')
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_provider().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -114,7 +130,9 @@ class NewsAggregator:
                         'source': source,
                         'summary': summary,
                         'url': url_link,
-                        'api': 'Alpha Vantage'
+                        'api': 'Alpha Vantage',
+                        'id': url_link or title,
+                        'published': _iso(_parse_av_time(article.get('time_published')))
                     })
                     
             return news_articles
@@ -123,8 +141,8 @@ class NewsAggregator:
             print(f"Alpha Vantage API error: {e}")
             return []
     
-    def get_newsapi_news(self, symbol, company_name):
-        """Get news from NewsAPI - Good for general company news"""
+    def get_newsapi_news(self, symbol, company_name, since=None):
+        """Get news from NewsAPI - Good for general company news, optionally only after since"""
         if not self.newsapi_key:
             return []
             
@@ -141,8 +159,10 @@ class NewsAggregator:
                 'pageSize': 5,
                 'apiKey': self.newsapi_key
             }
+            if since:
+                params['from'] = (since + timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%S')
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_provider().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -161,7 +181,9 @@ class NewsAggregator:
                         'source': source,
                         'summary': summary,
                         'url': url_link,
-                        'api': 'NewsAPI'
+                        'api': 'NewsAPI',
+                        'id': url_link or title,
+                        'published': (article.get('publishedAt') or '').replace('Z', '')[:19] or None
                     })
                     
             return news_articles
@@ -212,35 +234,56 @@ class NewsAggregator:
                 'api': 'Fallback'
             }]
 
-def get_latest_news(query):
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+def _iso(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S') if value else None
+
+def _parse_av_time(value):
+    try:
+        return datetime.strptime(value, '%Y%m%dT%H%M%S')
+    except (TypeError, ValueError):
+        return None
+
+def get_latest_news(query, force=False):
     """
     Main function to get latest news with improved relevance and multiple API support
+
+    Providers are polled incrementally into the shared news store (only for items newer
+    than each provider's cursor, and at most once per poll interval unless force is set);
+    the panel is served from the store.
     """
     news_aggregator = NewsAggregator()
+    store = get_news_store()
     
     # Clean the query (remove common stock suffixes)
     symbol = query.strip().upper()
     
-    # Get company name for better search
-    company_name = news_aggregator.get_company_name_from_symbol(symbol)
-    
-    all_news = []
+    # Get company name for better search (looked up once per symbol)
+    company_name = store.company_name(symbol, news_aggregator.get_company_name_from_symbol)
     
     # Try different APIs in order of preference
-    # 1. Finnhub (most generous free tier)
-    finnhub_news = news_aggregator.get_finnhub_news(symbol, company_name)
-    if finnhub_news:
-        all_news.extend(finnhub_news)
-    
-    # 2. NewsAPI (good for general news)
-    if len(all_news) < 3:
-        newsapi_news = news_aggregator.get_newsapi_news(symbol, company_name)
-        all_news.extend(newsapi_news)
+    providers = [
+        # 1. Finnhub (most generous free tier)
+        ('Finnhub', news_aggregator.get_finnhub_news, 0),
+        # 2. NewsAPI (good for general news)
+        ('NewsAPI', news_aggregator.get_newsapi_news, 3),
+        # 3. Alpha Vantage (limited but good quality)
+        ('Alpha Vantage', news_aggregator.get_alpha_vantage_news, 2),
+    ]
+    ahead = []
+    for name, fetch, needed_below in providers:
+        # Fall back only when the providers ahead of this one (after this pass's polls) have
+        # too little; a fallback's own articles must not stop it from ever being polled again
+        if needed_below and not force and store.count(symbol, providers=ahead) >= needed_below:
+            ahead.append(name)
+            continue
+        if store.due(symbol, name, force):
+            store.add(symbol, name, fetch(symbol, company_name, since=store.cursor(symbol, name)))
+        ahead.append(name)
     
-    # 3. Alpha Vantage (limited but good quality)
-    if len(all_news) < 2:
-        av_news = news_aggregator.get_alpha_vantage_news(symbol, company_name)
-        all_news.extend(av_news)
+    all_news = store.latest(symbol, limit=5)
     
     # 4. Fallback if no APIs work
     if not all_news:
@@ -267,6 +310,7 @@ def get_latest_news(query):
                         'api': api,
                         'summary': summary,
                         'url': url,
+                        'published': article.get('published'),
                         'display': f"📰 **{title}**\n*Source: {source} ({api})*\n{summary}"
                     })
                 else:
@@ -277,6 +321,7 @@ def get_latest_news(query):
                         'api': api,
                         'summary': summary,
                         'url': None,
+                        'published': article.get('published'),
                         'display': f"📰 **{title}**\n*Source: {source} ({api})*\n{summary}"
                     })
             else:
@@ -290,6 +335,7 @@ def get_latest_news(query):
                     'display': str(article)
                 })
         
+        cache_news(symbol, formatted_news)
         return formatted_news
     else:
         return [{
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+WINDOW = 50
+MIN_POLL_SECONDS = 120
+
+
+class NewsStore:
+    """Rolling per-symbol, per-provider news window with a cursor for incremental polling
+
+    The cursor is the newest publish time seen for a (symbol, provider) pair; providers
+    are asked only for items after it, and duplicates are dropped by article id.
+    """
+
+    def __init__(self, window=WINDOW, min_poll_seconds=MIN_POLL_SECONDS, path=None):
+        self.window = window
+        self.min_poll_seconds = min_poll_seconds
+        self.path = path
+        self._articles = {}
+        self._cursors = {}
+        self._polled = {}
+        self._names = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def _key(symbol, provider):
+        return symbol.strip().upper(), provider
+
+    def cursor(self, symbol, provider):
+        """Newest publish time (datetime) seen for this symbol and provider, or None"""
+        with self._lock:
+            return self._cursors.get(self._key(symbol, provider))
+
+    def due(self, symbol, provider, force=False):
+        """Whether the provider should be polled again for this symbol"""
+        if force:
+            return True
+        with self._lock:
+            last = self._polled.get(self._key(symbol, provider))
+        return last is None or time.time() - last >= self.min_poll_seconds
+
+    def add(self, symbol, provider, articles):
+        """Merge newly fetched articles; returns how many were actually new"""
+        key = self._key(symbol, provider)
+        added = 0
+        with self._lock:
+            window = self._articles.setdefault(key, deque(maxlen=self.window))
+            seen = {article['id'] for article in window}
+            cursor = self._cursors.get(key)
+            for article in sorted(articles, key=lambda a: a.get('published') or ''):
+                if article['id'] in seen:
+                    continue
+                window.append(article)
+                seen.add(article['id'])
+                added += 1
+                published = _parse_time(article.get('published'))
+                if published and (cursor is None or published > cursor):
+                    cursor = published
+            self._cursors[key] = cursor
+            self._polled[key] = time.time()
+        if added and self.path:
+            self._save()
+        return added
+
+    def count(self, symbol, providers=None):
+        """Articles held for a symbol, optionally only those from the given providers"""
+        symbol = symbol.strip().upper()
+        with self._lock:
+            return sum(len(items) for (s, provider), items in self._articles.items()
+                       if s == symbol and (providers is None or provider in providers))
+
+    def latest(self, symbol, limit=5, providers=None):
+        """Newest articles for a symbol across providers"""
+        symbol = symbol.strip().upper()
+        with self._lock:
+            articles = [article for (s, provider), items in self._articles.items()
+                        if s == symbol and (providers is None or provider in providers)
+                        for article in items]
+        articles.sort(key=lambda a: a.get('published') or '', reverse=True)
+        return articles[:limit]
+
+    def company_name(self, symbol, lookup):
+        """Cached company name, resolved once per symbol with lookup(symbol)"""
+        symbol = symbol.strip().upper()
+        with self._lock:
+            if symbol in self._names:
+                return self._names[symbol]
+        name = lookup(symbol)
+        with self._lock:
+            self._names[symbol] = name
+        return name
+
+    def _save(self):
+        with self._lock:
+            data = {
+                'articles': [[s, p, list(items)] for (s, p), items in self._articles.items()],
+                'cursors': [[s, p, c.isoformat() if c else None] for (s, p), c in self._cursors.items()],
+                'names': self._names,
+            }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"News store load error: {e}")
+            return
+        for symbol, provider, items in data.get('articles', []):
+            self._articles[(symbol, provider)] = deque(items, maxlen=self.window)
+        for symbol, provider, cursor in data.get('cursors', []):
+            self._cursors[(symbol, provider)] = _parse_time(cursor)
+        self._names.update(data.get('names', {}))
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_news_store():
+    """Process-wide news store shared by every session"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = NewsStore(
+                    window=int(os.environ.get("NEWS_WINDOW", WINDOW)),
+                    min_poll_seconds=float(os.environ.get("NEWS_POLL_SECONDS", MIN_POLL_SECONDS)),
+                    path=os.environ.get("NEWS_STORE_PATH") or None,
+                )
+    return _store
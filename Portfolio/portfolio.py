@@ -0,0 +1,303 @@
+import argparse
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from Providers.providers import get_provider
+
+TRADING_DAYS = 252
+
+
+def fetch_price_panel(symbols, period="1y", interval="1d"):
+    """Download closing prices for many symbols in one batched request"""
+    symbols = [s.strip().upper() for s in symbols if s.strip()]
+    if not symbols:
+        return pd.DataFrame()
+    closes = get_provider().close_panel(symbols, period=period, interval=interval, auto_adjust=True)
+    return closes.dropna(how="all").ffill()
+
+
+def parse_holdings(text):
+    """Parse 'SYMBOL, QUANTITY, COST' lines into a list of tuples"""
+    holdings = []
+    for line in text.splitlines():
+        parts = [p.strip() for p in line.replace(";", ",").split(",") if p.strip()]
+        if not parts or parts[0].startswith("#"):
+            continue
+        symbol = parts[0].upper()
+        quantity = float(parts[1]) if len(parts) > 1 else 1.0
+        cost = float(parts[2]) if len(parts) > 2 else np.nan
+        holdings.append((symbol, quantity, cost))
+    return holdings
+
+
+class Portfolio:
+    """Holdings and transactions with mark-to-market P&L and risk for the whole book"""
+
+    def __init__(self, var_window=TRADING_DAYS):
+        self.transactions = []
+        self.symbols = []
+        self._index = {}
+        self.quantity = np.zeros(0)
+        self.cost = np.zeros(0)
+        self.realized = np.zeros(0)
+        self._panel = pd.DataFrame()
+        # Bars from update() wait here as (timestamp, price array) until a frame is needed
+        self._pending = []
+        self._last_prices = np.zeros(0)
+        self.var_window = var_window
+        self._dirty = True
+
+    @property
+    def prices(self):
+        """Price panel (dates x symbols) including bars added by update()"""
+        self._flush()
+        return self._panel
+
+    def _flush(self):
+        """Append pending update() bars to the panel in one concat"""
+        if self._pending:
+            timestamps, rows = zip(*self._pending)
+            added = pd.DataFrame(np.vstack(rows), index=pd.Index(timestamps), columns=self.symbols)
+            panel = self._panel.reindex(columns=self.symbols)
+            self._panel = added if panel.empty else pd.concat([panel, added])
+            self._pending = []
+
+    def _position(self, symbol):
+        symbol = symbol.strip().upper()
+        if symbol not in self._index:
+            # Pending rows are laid out for the current symbols, so fold them in first
+            self._flush()
+            self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self.quantity = np.append(self.quantity, 0.0)
+            self.cost = np.append(self.cost, 0.0)
+            self.realized = np.append(self.realized, 0.0)
+        return self._index[symbol]
+
+    def add_transaction(self, symbol, quantity, price, date=None, fees=0.0):
+        """Record a buy (positive quantity) or sell (negative quantity)"""
+        i = self._position(symbol)
+        quantity = float(quantity)
+        price = float(price)
+        held = self.quantity[i]
+        if held != 0 and np.sign(quantity) != np.sign(held):
+            # Closing part of the position realizes P&L against the average cost
+            closed = min(abs(quantity), abs(held)) * np.sign(held)
+            avg_cost = self.cost[i] / held
+            self.realized[i] += closed * (price - avg_cost) - fees
+            self.cost[i] -= closed * avg_cost
+            self.quantity[i] -= closed
+            remaining = quantity + closed
+            if remaining != 0:
+                self.quantity[i] += remaining
+                self.cost[i] += remaining * price
+        else:
+            self.quantity[i] += quantity
+            self.cost[i] += quantity * price + fees
+        self.transactions.append({
+            'date': date or datetime.now(),
+            'symbol': self.symbols[i],
+            'quantity': quantity,
+            'price': price,
+            'fees': fees,
+        })
+        self._dirty = True
+
+    def add_holding(self, symbol, quantity, cost_price=np.nan):
+        """Add an existing position at its average cost
+
+        A NaN (unknown) cost is marked at the first price loaded for the symbol.
+        """
+        self.add_transaction(symbol, quantity, cost_price)
+
+    def _fill_costs(self, first_prices):
+        """Mark positions with an unknown cost at first_prices (aligned with symbols)"""
+        missing = np.isnan(self.cost) & ~np.isnan(first_prices)
+        self.cost[missing] = (self.quantity * first_prices)[missing]
+
+    def load_prices(self, panel):
+        """Use a wide price panel (dates x symbols) for valuation and risk"""
+        self._panel = panel.reindex(columns=self.symbols).astype(float).ffill()
+        self._pending = []
+        if len(self._panel):
+            self._fill_costs(self._panel.bfill().iloc[0].to_numpy())
+        self._dirty = True
+
+    def _prices_array(self):
+        if self.prices.empty:
+            return np.empty((0, len(self.symbols)))
+        return self.prices.reindex(columns=self.symbols).to_numpy(dtype=float)
+
+    def _rebuild(self):
+        """Recompute the book value history for the current quantities"""
+        prices = self._prices_array()
+        self._last_prices = prices[-1].copy() if len(prices) else np.full(len(self.symbols), np.nan)
+        values = np.nan_to_num(prices) @ self.quantity
+        self._values = list(values)
+        returns = np.diff(values) / np.where(values[:-1] == 0, np.nan, values[:-1])
+        returns = returns[np.isfinite(returns)]
+        self._returns = deque(returns[-self.var_window:], maxlen=self.var_window)
+        self._peak = float(values.max()) if len(values) else 0.0
+        drawdowns = values / np.maximum.accumulate(values) - 1 if len(values) else np.zeros(0)
+        self._max_drawdown = float(np.nanmin(drawdowns)) if len(values) else 0.0
+        self._dirty = False
+
+    def update(self, bar, timestamp=None):
+        """Append one bar of prices (symbol -> close) and update risk incrementally"""
+        if self._dirty:
+            self._rebuild()
+        row = np.array([bar.get(symbol, np.nan) for symbol in self.symbols], dtype=float)
+        # Symbols missing from the bar keep their last price
+        row = np.where(np.isnan(row), self._last_prices, row)
+        self._fill_costs(row)
+        self._pending.append((timestamp or datetime.now(), row))
+        self._last_prices = row
+        value = float(np.nan_to_num(row) @ self.quantity)
+        if self._values and self._values[-1] != 0:
+            ret = value / self._values[-1] - 1
+            self._returns.append(ret)
+        self._values.append(value)
+        self._peak = max(self._peak, value)
+        if self._peak > 0:
+            self._max_drawdown = min(self._max_drawdown, value / self._peak - 1)
+
+    def valuation(self):
+        """Mark-to-market table per position"""
+        prices = self._prices_array()
+        last = prices[-1] if len(prices) else np.full(len(self.symbols), np.nan)
+        market_value = self.quantity * last
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_cost = np.where(self.quantity != 0, self.cost / self.quantity, np.nan)
+            unrealized = market_value - self.cost
+            pnl_pct = np.where(self.cost != 0, unrealized / np.abs(self.cost) * 100, np.nan)
+            total = np.nansum(np.abs(market_value))
+            weight = np.abs(market_value) / total * 100 if total else np.zeros(len(self.symbols))
+            returns = np.diff(prices, axis=0) / prices[:-1]
+        volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100 if len(prices) > 2 \
+            else np.full(len(self.symbols), np.nan)
+        return pd.DataFrame({
+            'Quantity': self.quantity,
+            'Avg Cost': avg_cost,
+            'Last Price': last,
+            'Market Value': market_value,
+            'Unrealized P&L': unrealized,
+            'Realized P&L': self.realized,
+            'P&L %': pnl_pct,
+            'Weight %': weight,
+            'Volatility %': volatility,
+        }, index=pd.Index(self.symbols, name='Symbol'))
+
+    def summary(self, confidence=0.95):
+        """Book-level P&L and risk metrics; volatility and VaR use the trailing var_window returns"""
+        if self._dirty:
+            self._rebuild()
+        value = self._values[-1] if self._values else 0.0
+        cost = float(self.cost.sum())
+        returns = np.fromiter(self._returns, float, len(self._returns))
+        volatility = np.nan
+        if len(returns) > 1:
+            volatility = float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS))
+        var = np.nan
+        if len(returns):
+            # Historical one-day VaR, as a positive loss amount
+            var = -np.percentile(returns, (1 - confidence) * 100) * value
+        return {
+            'market_value': value,
+            'cost_basis': cost,
+            'unrealized_pnl': value - cost,
+            'realized_pnl': float(self.realized.sum()),
+            'volatility': volatility,
+            'var': var,
+            'var_confidence': confidence,
+            'max_drawdown': self._max_drawdown,
+            'current_drawdown': value / self._peak - 1 if self._peak else 0.0,
+        }
+
+    def allocation(self):
+        """Portfolio weight per symbol in percent"""
+        return self.valuation()['Weight %'].sort_values(ascending=False)
+
+
+def show_portfolio(holdings_text, period="1y"):
+    """Render the portfolio tracker in Streamlit"""
+    holdings = parse_holdings(holdings_text)
+    if not holdings:
+        st.info("Add holdings as `SYMBOL, QUANTITY, COST` - one per line")
+        return
+
+    key = tuple(holdings), period
+    if st.session_state.get('portfolio_key') != key:
+        portfolio = Portfolio()
+        for symbol, quantity, cost in holdings:
+            portfolio.add_holding(symbol, quantity, cost)
+        with st.spinner(f"Loading prices for {len(portfolio.symbols)} holdings..."):
+            panel = fetch_price_panel(portfolio.symbols, period=period)
+        if panel.empty:
+            st.warning("No price data found for these holdings.")
+            return
+        # Holdings entered without a cost are marked at the first available price
+        portfolio.load_prices(panel)
+        st.session_state.portfolio = portfolio
+        st.session_state.portfolio_key = key
+    portfolio = st.session_state.portfolio
+
+    summary = portfolio.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Market Value", f"{summary['market_value']:,.2f}",
+                delta=f"{summary['unrealized_pnl']:,.2f}")
+    col2.metric("Volatility (ann.)", f"{summary['volatility'] * 100:.2f}%")
+    col3.metric(f"1-day VaR ({summary['var_confidence']:.0%})", f"{summary['var']:,.2f}")
+    col4.metric("Max Drawdown", f"{summary['max_drawdown'] * 100:.2f}%")
+
+    st.dataframe(portfolio.valuation().round(2))
+    st.bar_chart(portfolio.allocation())
+
+
+def benchmark(n_positions=1000, n_bars=TRADING_DAYS, n_updates=100, seed=0):
+    """Time valuation and risk for a synthetic book of n_positions"""
+    rng = np.random.default_rng(seed)
+    symbols = [f"SYM{i:04d}" for i in range(n_positions)]
+    returns = rng.normal(0.0003, 0.02, size=(n_bars + n_updates, n_positions))
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+    dates = pd.bdate_range("2020-01-01", periods=n_bars + n_updates)
+    panel = pd.DataFrame(prices[:n_bars], index=dates[:n_bars], columns=symbols)
+
+    timings = {}
+    start = time.perf_counter()
+    portfolio = Portfolio()
+    for symbol, quantity in zip(symbols, rng.integers(1, 100, n_positions)):
+        portfolio.add_holding(symbol, quantity, 100.0)
+    timings['build'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    portfolio.load_prices(panel)
+    portfolio.summary()
+    timings['load + full summary'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    portfolio.valuation()
+    timings['valuation'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(n_bars, n_bars + n_updates):
+        portfolio.update(dict(zip(symbols, prices[i])), timestamp=dates[i])
+        portfolio.summary()
+    timings['update + summary (per bar)'] = (time.perf_counter() - start) / n_updates
+
+    for name, seconds in timings.items():
+        print(f"{name:<28} {seconds * 1000:10.2f} ms")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the portfolio tracker")
+    parser.add_argument("--positions", type=int, default=1000)
+    parser.add_argument("--bars", type=int, default=TRADING_DAYS)
+    parser.add_argument("--updates", type=int, default=100)
+    args = parser.parse_args()
+    benchmark(args.positions, args.bars, args.updates)
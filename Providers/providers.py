@@ -0,0 +1,518 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+
+# Query parameters that carry API keys and must never be written to disk
+SECRET_PARAMS = {'token', 'apikey', 'apiKey', 'api_key', 'key'}
+# Date-window params built from the clock or a polling cursor; they change every day, so a
+# recording keyed on them would never be found again
+VOLATILE_PARAMS = {'from', 'to', 'time_from', 'time_to'}
+# The same goes for the "Date: YYYY-MM-DD" line every LLM user message carries
+DATE_LINE = re.compile(r'^Date: \d{4}-\d{2}-\d{2}$', re.MULTILINE)
+
+PERIOD_DAYS = {'1d': 1, '5d': 5, '1mo': 30, '3mo': 91, '6mo': 182, '1y': 365,
+               '2y': 730, '5y': 1826, '10y': 3652, 'ytd': 365, 'max': 3652}
+INTERVAL_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+
+
+class ProviderError(Exception):
+    """Raised by the replay provider for misses and simulated failures"""
+
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code, body, url=""):
+        self.status_code = status_code
+        self._body = body
+        self.url = url
+
+    @property
+    def text(self):
+        return json.dumps(self._body)
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+def _clean_params(params):
+    return {k: v for k, v in (params or {}).items() if k not in SECRET_PARAMS}
+
+
+def _key_params(params):
+    """Params that identify a request for the cassette: no secrets, no date window"""
+    return {k: v for k, v in _clean_params(params).items() if k not in VOLATILE_PARAMS}
+
+
+def _key_body(body):
+    """Request body that identifies a request for the cassette: chat messages without today's date"""
+    if not isinstance(body, dict) or not isinstance(body.get('messages'), list):
+        return body
+    messages = [{**message, 'content': DATE_LINE.sub('Date: <today>', message['content'])}
+                if isinstance(message, dict) and isinstance(message.get('content'), str) else message
+                for message in body['messages']]
+    return {**body, 'messages': messages}
+
+
+def request_key(kind, target, **details):
+    """Stable cassette key for a request, ignoring secrets"""
+    blob = json.dumps({'kind': kind, 'target': target, **details}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+class LiveProvider:
+    """Talks to the real services: plain requests and yfinance"""
+
+    mode = 'live'
+
+    def get(self, url, params=None, headers=None, timeout=10):
+        return requests.get(url, params=params, headers=headers, timeout=timeout)
+
+    def post(self, url, json=None, headers=None, timeout=30):
+        return requests.post(url, json=json, headers=headers, timeout=timeout)
+
+    def history(self, symbol, period="3mo", interval="1d"):
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def financials(self, symbol):
+        return yf.Ticker(symbol).financials
+
+    def calendar(self, symbol):
+        calendar = yf.Ticker(symbol).calendar
+        if calendar is None or len(calendar) == 0:
+            return {}
+        if isinstance(calendar, pd.DataFrame):
+            # Older yfinance returns a frame with one row per field ('Earnings Date', ...)
+            frame = calendar if 'Earnings Date' in calendar.columns else calendar.T
+            return {str(field): frame[field].dropna().tolist() for field in frame.columns}
+        return dict(calendar)
+
+    def close_panel(self, symbols, period="1y", interval="1d", auto_adjust=True):
+        data = yf.download(list(symbols), period=period, interval=interval, auto_adjust=auto_adjust,
+                           group_by="column", threads=True, progress=False)
+        if data.empty:
+            return pd.DataFrame(columns=list(symbols))
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(symbols[0])
+        return closes.reindex(columns=list(symbols))
+
+
+class Cassette:
+    """Directory of recorded responses, one JSON file per request key"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, kind, key):
+        return os.path.join(self.directory, kind, f"{key}.json")
+
+    def load(self, kind, key):
+        path = self._path(kind, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, kind, key, record):
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(record, f, default=str)
+        os.replace(tmp, path)
+
+
+def _frame_to_record(frame):
+    return {'frame': frame.to_json(orient='table', date_format='iso', double_precision=15)}
+
+
+def _record_to_frame(record):
+    return pd.read_json(io.StringIO(record['frame']), orient='table')
+
+
+def _statement_to_record(frame):
+    # Statements have line items as rows and report dates as columns
+    return {'statement': frame.rename(columns=str).to_json(orient='split', double_precision=15)}
+
+
+def _record_to_statement(record):
+    frame = pd.read_json(io.StringIO(record['statement']), orient='split')
+    frame.columns = pd.to_datetime(frame.columns)
+    return frame
+
+
+class RecordingProvider:
+    """Forwards to the live provider and writes every response to a cassette"""
+
+    mode = 'record'
+
+    def __init__(self, cassette, live=None):
+        self.cassette = cassette
+        self.live = live or LiveProvider()
+
+    def _record_http(self, kind, url, params, body, response):
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = response.text
+        key = request_key(kind, url, params=_key_params(params), body=_key_body(body))
+        self.cassette.save('http', key, {
+            'request': {'method': kind, 'url': url, 'params': _clean_params(params), 'body': body},
+            'status': response.status_code,
+            'body': payload,
+        })
+
+    def get(self, url, params=None, headers=None, timeout=10):
+        response = self.live.get(url, params=params, headers=headers, timeout=timeout)
+        self._record_http('GET', url, params, None, response)
+        return response
+
+    def post(self, url, json=None, headers=None, timeout=30):
+        response = self.live.post(url, json=json, headers=headers, timeout=timeout)
+        self._record_http('POST', url, None, json, response)
+        return response
+
+    def history(self, symbol, period="3mo", interval="1d"):
+        frame = self.live.history(symbol, period=period, interval=interval)
+        key = request_key('history', symbol, period=period, interval=interval)
+        self.cassette.save('history', key, _frame_to_record(frame))
+        return frame
+
+    def info(self, symbol):
+        info = self.live.info(symbol)
+        self.cassette.save('info', request_key('info', symbol), {'info': info})
+        return info
+
+    def financials(self, symbol):
+        frame = self.live.financials(symbol)
+        self.cassette.save('financials', request_key('financials', symbol), _statement_to_record(frame))
+        return frame
+
+    def calendar(self, symbol):
+        calendar = self.live.calendar(symbol)
+        self.cassette.save('calendar', request_key('calendar', symbol), {'calendar': calendar})
+        return calendar
+
+    def close_panel(self, symbols, period="1y", interval="1d", auto_adjust=True):
+        frame = self.live.close_panel(symbols, period=period, interval=interval, auto_adjust=auto_adjust)
+        key = request_key('close_panel', sorted(symbols), period=period, interval=interval,
+                          auto_adjust=auto_adjust)
+        self.cassette.save('close_panel', key, _frame_to_record(frame))
+        return frame
+
+
+class ReplayProvider:
+    """Serves recorded responses locally with simulated latency, errors and rate limits
+
+    latency is a mean delay in seconds (jittered +/-50%), error_rate the fraction of
+    calls that fail, and rate_limit the calls per minute allowed per host. Requests
+    that were never recorded get synthetic data when synthesize is on.
+    """
+
+    mode = 'replay'
+
+    def __init__(self, cassette, latency=0.0, error_rate=0.0, rate_limit=0, synthesize=True, seed=None):
+        self.cassette = cassette
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.synthesize = synthesize
+        self._random = random.Random(seed)
+        self._calls = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _simulate(self, host):
+        """Apply latency and decide whether this call is rate limited or fails"""
+        with self._lock:
+            delay = self.latency * self._random.uniform(0.5, 1.5) if self.latency else 0.0
+            failed = self.error_rate and self._random.random() < self.error_rate
+            limited = False
+            if self.rate_limit:
+                now = time.monotonic()
+                calls = self._calls[host]
+                while calls and now - calls[0] > 60:
+                    calls.popleft()
+                limited = len(calls) >= self.rate_limit
+                if not limited:
+                    calls.append(now)
+        if delay:
+            time.sleep(delay)
+        if limited:
+            return 429
+        if failed:
+            return 503
+        return 200
+
+    def _http(self, method, url, params, body):
+        status = self._simulate(urlparse(url).netloc)
+        if status != 200:
+            return ReplayResponse(status, {'error': 'Too Many Requests' if status == 429 else 'Service Unavailable'}, url)
+        key = request_key(method, url, params=_key_params(params), body=_key_body(body))
+        record = self.cassette.load('http', key)
+        if record is not None:
+            return ReplayResponse(record['status'], record['body'], url)
+        if not self.synthesize:
+            raise ProviderError(f"No recording for {method} {url}")
+        return ReplayResponse(200, synthetic_http(url, params, body), url)
+
+    def _market(self, host):
+        status = self._simulate(host)
+        if status == 429:
+            raise ProviderError("Too Many Requests. Rate limited. Try after a while.")
+        if status != 200:
+            raise ProviderError("Simulated market data outage")
+
+    def get(self, url, params=None, headers=None, timeout=10):
+        return self._http('GET', url, params, None)
+
+    def post(self, url, json=None, headers=None, timeout=30):
+        return self._http('POST', url, None, json)
+
+    def history(self, symbol, period="3mo", interval="1d"):
+        self._market('yfinance')
+        record = self.cassette.load('history', request_key('history', symbol, period=period, interval=interval))
+        if record is not None:
+            return _record_to_frame(record)
+        if not self.synthesize:
+            raise ProviderError(f"No recording for history {symbol} {period} {interval}")
+        return synthetic_bars(symbol, period, interval)
+
+    def info(self, symbol):
+        self._market('yfinance')
+        record = self.cassette.load('info', request_key('info', symbol))
+        if record is not None:
+            return record['info']
+        if not self.synthesize:
+            raise ProviderError(f"No recording for info {symbol}")
+        return synthetic_info(symbol)
+
+    def financials(self, symbol):
+        self._market('yfinance')
+        record = self.cassette.load('financials', request_key('financials', symbol))
+        if record is not None:
+            return _record_to_statement(record)
+        if not self.synthesize:
+            raise ProviderError(f"No recording for financials {symbol}")
+        return synthetic_financials(symbol)
+
+    def calendar(self, symbol):
+        self._market('yfinance')
+        record = self.cassette.load('calendar', request_key('calendar', symbol))
+        if record is not None:
+            return record['calendar']
+        if not self.synthesize:
+            raise ProviderError(f"No recording for calendar {symbol}")
+        return {'Earnings Date': [str((datetime.now() + timedelta(days=_seed(symbol) % 90)).date())]}
+
+    def close_panel(self, symbols, period="1y", interval="1d", auto_adjust=True):
+        self._market('yfinance')
+        key = request_key('close_panel', sorted(symbols), period=period, interval=interval,
+                          auto_adjust=auto_adjust)
+        record = self.cassette.load('close_panel', key)
+        if record is not None:
+            return _record_to_frame(record).reindex(columns=list(symbols))
+        if not self.synthesize:
+            raise ProviderError(f"No recording for close panel {period} {interval}")
+        closes = {s: synthetic_bars(s, period, interval)['Close'] for s in symbols}
+        return pd.DataFrame(closes).reindex(columns=list(symbols))
+
+
+def _seed(symbol):
+    return int(hashlib.md5(symbol.upper().encode('utf-8')).hexdigest()[:8], 16)
+
+
+def synthetic_bars(symbol, period="3mo", interval="1d"):
+    """Deterministic random-walk OHLCV bars shaped like yfinance history"""
+    rng = np.random.default_rng(_seed(symbol))
+    end = pd.Timestamp(datetime.now().date())
+    start = end - timedelta(days=PERIOD_DAYS.get(period, 91))
+    days = pd.bdate_range(start, end)
+    if interval in INTERVAL_MINUTES:
+        step = INTERVAL_MINUTES[interval]
+        session = pd.timedelta_range("09:30:00", "15:59:00", freq=f"{step}min")
+        days = days[-min(len(days), 60 if step > 1 else 7):]
+        index = pd.DatetimeIndex([d + t for d in days for t in session])
+        vol = 0.02 / np.sqrt(len(session))
+    else:
+        index = days
+        vol = 0.02
+    n = len(index)
+    close = (50 + _seed(symbol) % 450) * np.exp(np.cumsum(rng.normal(0.0002, vol, n)))
+    spread = np.abs(rng.normal(0, vol, n)) * close
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    frame = pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(100_000, 5_000_000, n),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index.rename('Date'))
+    return frame
+
+
+def synthetic_info(symbol):
+    base = symbol.upper().replace('.NS', '').replace('.BO', '')
+    rng = np.random.default_rng(_seed(symbol))
+    sectors = ['Technology', 'Financial Services', 'Energy', 'Healthcare', 'Consumer Cyclical']
+    return {'symbol': symbol.upper(), 'longName': f"{base} Limited", 'shortName': base,
+            'sector': sectors[_seed(symbol) % len(sectors)], 'industry': 'Diversified', 'currency': 'INR',
+            'marketCap': float(rng.uniform(1e9, 2e12)), 'trailingPE': float(rng.uniform(8, 60)),
+            'forwardPE': float(rng.uniform(8, 50)), 'priceToBook': float(rng.uniform(0.8, 12)),
+            'dividendYield': float(rng.uniform(0, 4)), 'profitMargins': float(rng.uniform(0.02, 0.3)),
+            'returnOnEquity': float(rng.uniform(0.02, 0.35)), 'debtToEquity': float(rng.uniform(0, 150)),
+            'revenueGrowth': float(rng.normal(0.08, 0.1)), 'earningsGrowth': float(rng.normal(0.1, 0.2)),
+            'beta': float(rng.uniform(0.5, 1.6)), 'trailingEps': float(rng.uniform(5, 120))}
+
+
+def synthetic_financials(symbol):
+    """Four years of a small income statement, shaped like yfinance financials"""
+    rng = np.random.default_rng(_seed(symbol))
+    dates = pd.to_datetime([f"{datetime.now().year - i}-03-31" for i in range(1, 5)])
+    revenue = float(rng.uniform(1e9, 1e11)) / np.cumprod([1.0] + list(rng.uniform(1.0, 1.2, 3)))
+    net_income = revenue * rng.uniform(0.05, 0.25)
+    return pd.DataFrame([revenue, net_income, net_income * 1.3],
+                        index=['Total Revenue', 'Net Income', 'EBITDA'], columns=dates)
+
+
+def synthetic_http(url, params=None, body=None):
+    """Plausible empty-ish payloads for the HTTP APIs the app talks to"""
+    host = urlparse(url).netloc
+    now = datetime.now()
+    if 'groq' in host and (body or {}).get('response_format'):
+        # Batched requests list their task ids in the schema's first "required" array
+        prompt = body['messages'][-1]['content']
+        match = re.search(r'"required": \[([^\]]*)\]', prompt)
+        task_ids = re.findall(r'"([^"]+)"', match.group(1)) if match else []
+        answers = {task_id: f"Synthetic answer for {task_id} served by the replay provider." for task_id in task_ids}
+        return {'choices': [{'message': {'role': 'assistant', 'content': json.dumps({'answers': answers})}}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0}}
+    if 'groq' in host:
+        return {'choices': [{'message': {'role': 'assistant',
+                                         'content': "### 📊 Offline Replay\nThis is a synthetic analysis served by the replay provider."}}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0}}
+    if 'finnhub' in host:
+        symbol = (params or {}).get('symbol', 'STOCK')
+        return [{'id': i, 'headline': f"{symbol} synthetic headline {i + 1}", 'source': 'Replay',
+                 'summary': 'Synthetic article served offline.', 'url': f"https://example.com/{symbol}/{i}",
+                 'datetime': int((now - timedelta(hours=i)).timestamp())} for i in range(5)]
+    if 'newsapi' in host:
+        return {'status': 'ok', 'articles': [{'title': f"Synthetic market story {i + 1}",
+                                              'source': {'name': 'Replay'}, 'description': 'Synthetic article served offline.',
+                                              'url': f"https://example.com/newsapi/{i}",
+                                              'publishedAt': (now - timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%SZ')}
+                                             for i in range(5)]}
+    if 'alphavantage' in host:
+        return {'feed': [{'title': f"Synthetic sentiment story {i + 1}", 'source': 'Replay',
+                          'summary': 'Synthetic article served offline.', 'url': f"https://example.com/av/{i}",
+                          'time_published': (now - timedelta(hours=i)).strftime('%Y%m%dT%H%M%S')}
+                         for i in range(5)]}
+    return {}
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def provider_from_env():
+    """Build a provider from STOCKBOT_DATA_MODE and related environment variables"""
+    mode = os.environ.get("STOCKBOT_DATA_MODE", "live").lower()
+    cassette = Cassette(os.environ.get("STOCKBOT_CASSETTE_DIR", ".cassettes"))
+    if mode == 'record':
+        return RecordingProvider(cassette)
+    if mode == 'replay':
+        return ReplayProvider(
+            cassette,
+            latency=float(os.environ.get("STOCKBOT_REPLAY_LATENCY", 0)),
+            error_rate=float(os.environ.get("STOCKBOT_REPLAY_ERROR_RATE", 0)),
+            rate_limit=int(os.environ.get("STOCKBOT_REPLAY_RATE_LIMIT", 0)),
+            synthesize=os.environ.get("STOCKBOT_REPLAY_SYNTHETIC", "1") != "0",
+        )
+    return LiveProvider()
+
+
+def get_provider():
+    """Process-wide data provider, configured from the environment on first use"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = provider_from_env()
+    return _provider
+
+
+def set_provider(provider):
+    """Swap the process-wide provider (e.g. for load tests or benchmarks)"""
+    global _provider
+    _provider = provider
+
+
+_history_cache = {}
+_history_lock = threading.Lock()
+HISTORY_TTL = float(os.environ.get("STOCKBOT_HISTORY_TTL", 300))
+HISTORY_CACHE_SIZE = 512
+
+
+def cached_history(symbol, period="3mo", interval="1d", ttl=None):
+    """Bars from the current provider, reused for ttl seconds across callers and sessions"""
+    ttl = HISTORY_TTL if ttl is None else ttl
+    key = (symbol.strip().upper(), period, interval)
+    now = time.monotonic()
+    with _history_lock:
+        hit = _history_cache.get(key)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1].copy()
+    frame = get_provider().history(key[0], period=period, interval=interval)
+    with _history_lock:
+        _history_cache[key] = (now, frame)
+        if len(_history_cache) > HISTORY_CACHE_SIZE:
+            oldest = min(_history_cache, key=lambda k: _history_cache[k][0])
+            del _history_cache[oldest]
+    return frame.copy()
+
+
+def record_symbols(symbols, directory=".cassettes", periods=("3mo",)):
+    """Capture bars, company info and news for symbols into a cassette"""
+    from News_Scrapper.news import get_latest_news
+
+    set_provider(RecordingProvider(Cassette(directory)))
+    provider = get_provider()
+    for symbol in symbols:
+        symbol = symbol.strip().upper()
+        for period in periods:
+            provider.history(symbol, period=period)
+        provider.info(symbol)
+        get_latest_news(symbol)
+        print(f"Recorded {symbol}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record live responses for offline replay")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--dir", default=os.environ.get("STOCKBOT_CASSETTE_DIR", ".cassettes"))
+    parser.add_argument("--period", action="append", help="History periods to record (default 3mo)")
+    args = parser.parse_args()
+    record_symbols(args.symbols, args.dir, tuple(args.period or ["3mo"]))
@@ -0,0 +1,76 @@
+import streamlit as st
+
+from Graphs.charts import show_chart
+from Chat_bot.chatbot import display_enhanced_response
+from Snapshots.store import get_snapshot_store
+
+
+def save_analysis(symbol, data, news_items, insights, meta=None):
+    """Snapshot a finished analysis; returns its ID, or None if there is nothing worth keeping"""
+    if data is None or data.empty:
+        return None
+    answers = {task_id: text for task_id, text in (insights or {}).items()
+               if isinstance(text, str) and not text.startswith(("Error", "⚠️"))}
+    if not answers:
+        return None
+    news = [item for item in (news_items or []) if isinstance(item, dict)]
+    return get_snapshot_store().save(symbol, data, news, answers, meta)
+
+
+def show_snapshot(snapshot_id):
+    """Render a saved analysis without refetching data or calling the LLM"""
+    try:
+        snapshot = get_snapshot_store().load(snapshot_id)
+    except ValueError:
+        snapshot = None
+    if snapshot is None:
+        st.warning(f"Snapshot `{snapshot_id}` was not found; it may have expired.")
+        return False
+
+    symbol = snapshot['symbol']
+    insights = snapshot['insights']
+    meta = snapshot['meta']
+    st.success(f"📸 Snapshot of **{symbol}** saved {snapshot['created_at'].replace('T', ' ')} • ID `{snapshot['id']}`")
+
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        st.subheader("📈 Price Chart")
+        show_chart(symbol, data=snapshot['data'], insight=insights.get('chart_insight', "No chart insight was saved."))
+    with col2:
+        st.subheader("📰 News at the Time")
+        if not snapshot['news']:
+            st.info("📭 No news was saved with this snapshot")
+        for item in snapshot['news'][:4]:
+            st.markdown(f"**{item.get('title', '')}**")
+            st.caption(f"*Source: {item.get('source', '')} ({item.get('api', '')})*")
+            if item.get('summary'):
+                st.write(item['summary'])
+            if str(item.get('url', '')).startswith('http'):
+                st.markdown(f"🔗 [Read Full Article]({item['url']})")
+            st.divider()
+
+    if insights.get('indicator_insights'):
+        st.subheader("📊 Technical Insights")
+        st.markdown(insights['indicator_insights'])
+    if insights.get('analysis'):
+        st.subheader("🤖 AI Stock Market Analyst")
+        if meta.get('query'):
+            st.caption(f"💬 {meta['query']} | 🎯 Focus: {meta.get('focus', 'Comprehensive Analysis')}")
+        st.success("🎯 **Professional Market Analysis:**")
+        display_enhanced_response(insights['analysis'])
+    return True
+
+
+def show_snapshot_list(symbol=None, limit=10):
+    """Recent snapshots with buttons that open them by ID"""
+    entries = get_snapshot_store().list(symbol, limit=limit)
+    if not entries:
+        st.info("No saved analyses yet. Run a professional analysis to save one.")
+        return
+    for entry in entries:
+        col_info, col_open = st.columns([4, 1])
+        col_info.write(f"`{entry['id']}` • **{entry['symbol']}** • {entry['created_at'].replace('T', ' ')} • "
+                       f"{entry['meta'].get('focus', '')}")
+        if col_open.button("Open", key=f"open_snapshot_{entry['id']}"):
+            st.query_params["snapshot"] = entry['id']
+            st.rerun()
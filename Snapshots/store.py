@@ -0,0 +1,204 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_DIR = os.environ.get("SNAPSHOT_DIR", ".snapshots")
+MAX_MB = 200
+MAX_AGE_DAYS = 30
+ID_LENGTH = 16
+ID_PATTERN = re.compile(r'^[0-9a-f]{8,64}$')
+METADATA_KEY = b'stockbot.snapshot'
+
+
+def snapshot_id(symbol, data, news, insights):
+    """Content hash of an analysis; the same chart, news and AI output always get the same ID"""
+    digest = hashlib.sha256()
+    digest.update(symbol.strip().upper().encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(json.dumps(list(data.columns)).encode('utf-8'))
+    digest.update(json.dumps([news, insights], sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()[:ID_LENGTH]
+
+
+class SnapshotStore:
+    """Content-addressed analysis snapshots: one Parquet file per analysis
+
+    The indicator frame is the table; news, AI answers and metadata ride along as JSON in
+    the file's schema metadata, so listing snapshots only reads footers. Files older than
+    max_age_days are dropped, then the least recently opened until the store fits max_mb.
+    """
+
+    def __init__(self, path=STORE_DIR, max_mb=MAX_MB, max_age_days=MAX_AGE_DAYS):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 86400
+        self._lock = threading.Lock()
+        # Creation time per file; snapshots never change once written, so it is read once
+        self._created = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, snapshot_id):
+        if not ID_PATTERN.match(snapshot_id or ''):
+            raise ValueError(f"Invalid snapshot id {snapshot_id!r}")
+        return os.path.join(self.path, f"{snapshot_id}.parquet")
+
+    def save(self, symbol, data, news=None, insights=None, meta=None):
+        """Store an analysis and return its ID (existing identical snapshots are reused)"""
+        news = news or []
+        insights = insights or {}
+        sid = snapshot_id(symbol, data, news, insights)
+        path = self._file(sid)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        if stat and time.time() - self._created_at(path, stat.st_mtime) <= self.max_age_seconds:
+            os.utime(path)
+            return sid
+        # New, or so old that the next evict() would drop it: (re)write with a fresh created_at
+        payload = {
+            'id': sid,
+            'symbol': symbol.strip().upper(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'news': news,
+            'insights': insights,
+            'meta': meta or {},
+        }
+        table = pa.Table.from_pandas(data, preserve_index=True)
+        metadata = dict(table.schema.metadata or {})
+        metadata[METADATA_KEY] = json.dumps(payload, default=str).encode('utf-8')
+        buffer = io.BytesIO()
+        pq.write_table(table.replace_schema_metadata(metadata), buffer, compression='zstd')
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp, path)
+        self._created.pop(path, None)
+        self.evict()
+        return sid
+
+    def load(self, snapshot_id):
+        """Snapshot dict (id, symbol, created_at, news, insights, meta, data) or None if unknown
+
+        Raises ValueError for an invalid ID or a file that is not a readable snapshot.
+        """
+        path = self._file(snapshot_id)
+        try:
+            table = pq.read_table(path)
+        except FileNotFoundError:
+            return None
+        try:
+            snapshot = json.loads(table.schema.metadata[METADATA_KEY])
+        except (KeyError, TypeError, ValueError) as e:
+            # A partial or foreign file under a valid name
+            raise ValueError(f"Snapshot {snapshot_id!r} is unreadable: {type(e).__name__}") from e
+        snapshot['data'] = table.to_pandas()
+        # Opening a snapshot counts as use for eviction
+        os.utime(path)
+        return snapshot
+
+    def list(self, symbol=None, limit=20):
+        """Newest snapshots' metadata (no frames), optionally for one symbol"""
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith('.parquet'):
+                continue
+            try:
+                payload = json.loads(pq.read_schema(os.path.join(self.path, name)).metadata[METADATA_KEY])
+            except (OSError, KeyError, ValueError, pa.ArrowException):
+                continue
+            if symbol and payload['symbol'] != symbol.strip().upper():
+                continue
+            payload.pop('news', None)
+            payload['insights'] = sorted(payload.get('insights', {}))
+            entries.append(payload)
+        entries.sort(key=lambda p: p['created_at'], reverse=True)
+        return entries[:limit]
+
+    def _created_at(self, path, mtime):
+        """Epoch seconds the snapshot was saved (from its metadata; mtime if unreadable)"""
+        if path not in self._created:
+            try:
+                payload = json.loads(pq.read_schema(path).metadata[METADATA_KEY])
+                self._created[path] = datetime.fromisoformat(payload['created_at']).timestamp()
+            except (OSError, KeyError, TypeError, ValueError, pa.ArrowException):
+                return mtime
+        return self._created[path]
+
+    def evict(self, now=None):
+        """Drop snapshots created over max_age_days ago, then least recently used ones until under the size limit
+
+        Age comes from created_at in the metadata; save and load refresh mtime, which orders the LRU.
+        """
+        now = now or time.time()
+        removed = 0
+        with self._lock:
+            files = []
+            for name in os.listdir(self.path):
+                if not name.endswith('.parquet'):
+                    continue
+                path = os.path.join(self.path, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            files.sort()
+            total = sum(size for _, size, _ in files)
+            for mtime, size, path in files:
+                expired = now - self._created_at(path, mtime) > self.max_age_seconds
+                if not expired and total <= self.max_bytes:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self._created.pop(path, None)
+                total -= size
+                removed += 1
+        return removed
+
+    def size(self):
+        return sum(os.path.getsize(os.path.join(self.path, name)) for name in os.listdir(self.path)
+                   if name.endswith('.parquet'))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store():
+    """Process-wide snapshot store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SnapshotStore(
+                    path=os.environ.get("SNAPSHOT_DIR", STORE_DIR),
+                    max_mb=float(os.environ.get("SNAPSHOT_MAX_MB", MAX_MB)),
+                    max_age_days=float(os.environ.get("SNAPSHOT_MAX_AGE_DAYS", MAX_AGE_DAYS)),
+                )
+    return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or prune saved analysis snapshots")
+    parser.add_argument("--symbol")
+    parser.add_argument("--evict", action="store_true", help="Apply the size/age limits now")
+    args = parser.parse_args()
+    store = get_snapshot_store()
+    if args.evict:
+        print(f"Evicted {store.evict()} snapshots")
+    for entry in store.list(args.symbol, limit=100):
+        print(f"{entry['id']}  {entry['symbol']:<12} {entry['created_at']}  {', '.join(entry['insights'])}")
+    print(f"{store.size() / 1024:.1f} KB in {store.path}")
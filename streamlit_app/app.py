@@ -5,7 +5,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import streamlit as st
 from Graphs.charts import show_chart
 from News_Scrapper.news import get_latest_news
-from Chat_bot.chatbot import get_bot_response, generate_ai_insights, display_enhanced_response, display_metrics_in_columns
+from Portfolio.portfolio import show_portfolio
+from Alerts.alerts import show_alerts
+from Providers.providers import get_provider
+from Fundamentals.fundamentals import show_fundamentals
+from Graphs.patterns import scan_watchlist
+from Chat_bot.chatbot import indicator_insights_prompt, display_enhanced_response, display_metrics_in_columns
+from Chat_bot.batch import InsightBatch
+from Api_service.client import get_client, RemoteInsightBatch
+from Snapshots.snapshots import save_analysis, show_snapshot, show_snapshot_list
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -20,6 +28,15 @@ st.set_page_config(
 st.title("📈 Stock Market Bot")
 st.caption("Your smart companion for stock analysis")
 
+# Shared or revisited analysis: render the saved snapshot instead of recomputing anything
+snapshot_param = st.query_params.get("snapshot")
+if snapshot_param:
+    if st.button("⬅️ Back to live analysis", key="leave_snapshot"):
+        del st.query_params["snapshot"]
+        st.rerun()
+    show_snapshot(snapshot_param)
+    st.stop()
+
 # Stock input with example
 col_input, col_example = st.columns([3, 1])
 
@@ -42,15 +59,27 @@ if "symbol" in st.session_state:
 if symbol:
     # Display current analysis
     st.success(f"📊 Analyzing: **{symbol.upper()}**")
+
+    # With STOCKBOT_API_URL set, charts, news and AI insights come from the analysis service
+    client = get_client()
+
+    # Every AI task on this page is queued here and answered in one batched request at the end
+    if client is not None:
+        batch = RemoteInsightBatch(client, symbol.strip(), route_models=st.session_state.get('route_models', True))
+    else:
+        batch = InsightBatch(symbol.strip(), route_models=st.session_state.get('route_models', True))
     
     # Chart and News layout
     col1, col2 = st.columns([3, 2])
+    chart_data = None
+    news_items = []
     
     with col1:
         st.subheader("📈 Price Chart")
         with st.spinner("Loading chart..."):
             try:
-                show_chart(symbol.strip())
+                chart_data = client.indicators(symbol.strip(), indicators=st.session_state.get('chart_indicators')) if client is not None else None
+                chart_data = show_chart(symbol.strip(), batch=batch, data=chart_data)
             except Exception as e:
                 st.error(f"Error loading chart: {str(e)}")
                 st.info("💡 Try checking the stock symbol or try again later")
@@ -59,7 +88,11 @@ if symbol:
         st.subheader("📰 Latest News")
         with st.spinner("Fetching news..."):
             try:
-                news_items = get_latest_news(symbol.strip())
+                refresh = st.session_state.pop('refresh_news', False)
+                if client is not None:
+                    news_items = client.news(symbol.strip(), force=refresh)
+                else:
+                    news_items = get_latest_news(symbol.strip(), force=refresh)
                 if news_items:
                     for i, news_item in enumerate(news_items[:4]):
                         # Check if it's the new enhanced format (dict) or legacy format (string)
@@ -97,7 +130,8 @@ if symbol:
                 st.info("💡 This might be due to API limits or network issues. Try again in a moment.")
         
         # Add refresh button
-        if st.button("🔄 Refresh News", key="refresh_news", help="Get the latest news updates"):
+        if st.button("🔄 Refresh News", key="refresh_news_button", help="Get the latest news updates"):
+            st.session_state.refresh_news = True
             st.rerun()
         
         # Show configured APIs status
@@ -113,6 +147,8 @@ if symbol:
             }
             for api, status in apis_status.items():
                 st.write(f"- {api}: {status}")
+            st.write(f"**Data Mode:** {get_provider().mode}")
+            st.write(f"**Analysis Service:** {client.base_url if client is not None else 'in-process'}")
             
             if news_items and len(news_items) > 0:
                 st.write("**Last News Item Structure:**")
@@ -148,13 +184,27 @@ if symbol:
             sample_sma = "Above 50-day SMA"
             
             # Generate insights for the technical indicators
-            with st.spinner("🤖 Generating technical insights..."):
-                try:
-                    insights = generate_ai_insights(sample_rsi, sample_macd, sample_sma)
+            metrics_slot = st.empty()
+            metrics_slot.caption("🤖 Generating technical insights...")
+
+            def render_metrics(insights, slot=metrics_slot):
+                with slot.container():
                     display_metrics_in_columns(sample_rsi, sample_macd, sample_sma, insights)
-                except Exception as e:
-                    st.error(f"Error generating technical insights: {str(e)}")
+
+            batch.add(
+                "indicator_insights",
+                indicator_insights_prompt(sample_rsi, sample_macd, sample_sma),
+                short=True,
+                render=render_metrics
+            )
     
+    # Fundamentals snapshot (also feeds the AI analyst's prompt context)
+    with st.expander("💼 Fundamentals Snapshot", expanded=False):
+        try:
+            show_fundamentals(symbol.strip())
+        except Exception as e:
+            st.error(f"Error loading fundamentals: {str(e)}")
+
     st.divider()
     
     # AI Assistant section (Enhanced)
@@ -201,6 +251,12 @@ if symbol:
         ["Comprehensive Analysis", "Technical Analysis Only", "Fundamental Analysis Only", "Market Sentiment Only"],
         help="Choose the type of analysis you want"
     )
+    st.checkbox(
+        "⚡ Use a faster model for short insights",
+        value=True,
+        key="route_models",
+        help="Chart and indicator one-liners go to a smaller model; full analyses keep the large one"
+    )
     
     if st.button("🚀 Get Professional Analysis", type="primary"):
         if query:
@@ -214,32 +270,103 @@ if symbol:
             else:
                 enhanced_query = query
             
-            with st.spinner("🤖 AI Analyst is preparing comprehensive analysis..."):
-                try:
-                    response = get_bot_response(enhanced_query, symbol.strip())
-                    
+            analysis_slot = st.empty()
+            analysis_slot.caption("🤖 AI Analyst is preparing comprehensive analysis...")
+
+            def render_analysis(response, slot=analysis_slot):
+                with slot.container():
                     # Enhanced display with proper formatting
                     st.success("🎯 **Professional Market Analysis:**")
                     display_enhanced_response(response)  # ✅ NEW: Enhanced display instead of st.write()
-                    
+
                     # Add analysis metadata
                     st.divider()
                     st.caption(f"📅 Analysis generated on {st.session_state.get('analysis_time', 'now')} | 📊 Stock: {symbol.upper()} | 🎯 Focus: {analysis_type}")
-                    
-                    # Clear selected query after response
-                    if 'selected_query' in st.session_state:
-                        del st.session_state.selected_query
-                        
-                except Exception as e:
-                    st.error(f"Error getting AI response: {str(e)}")
-                    st.info("💡 Try rephrasing your question or check connection")
+
+                # Clear selected query after response
+                if 'selected_query' in st.session_state:
+                    del st.session_state.selected_query
+
+            batch.add("analysis", enhanced_query, render=render_analysis)
         else:
             st.warning("Please enter a question first!")
     
     # Additional Analysis Tools
     with st.expander("🔧 Advanced Analysis Tools", expanded=False):
+        st.write("**💼 Portfolio Tracker:**")
+        holdings_text = st.text_area(
+            "Holdings (one per line: SYMBOL, QUANTITY, COST):",
+            value=st.session_state.get('holdings_text', f"{symbol.upper()}, 10"),
+            height=120,
+            help="Leave COST empty to use the first price in the selected period"
+        )
+        portfolio_period = st.selectbox("Price history:", ["3mo", "6mo", "1y", "2y", "5y"], index=2)
+        if st.button("📊 Analyze Portfolio"):
+            st.session_state.holdings_text = holdings_text
+        if st.session_state.get('holdings_text'):
+            try:
+                show_portfolio(st.session_state.holdings_text, period=portfolio_period)
+            except Exception as e:
+                st.error(f"Error analyzing portfolio: {str(e)}")
+
+        st.divider()
+        st.write("**🔔 Indicator Alerts:**")
+        rules_text = st.text_area(
+            "Alert rules (one per line):",
+            value="RSI crosses below 30\nRSI crosses above 70\nMACD crosses above Signal\nClose breaks BB_Upper",
+            height=110,
+            help="Indicators: Close, MACD, Signal, RSI, BB_Upper, BB_Middle, BB_Lower"
+        )
+        if st.button("🔔 Check Recent Alerts"):
+            try:
+                show_alerts(symbol.strip(), rules_text)
+            except Exception as e:
+                st.error(f"Error evaluating alerts: {str(e)}")
+
+        st.divider()
+        st.write("**🧭 Pattern Scanner:**")
+        watchlist_text = st.text_input(
+            "Watchlist (comma separated):",
+            value=", ".join(dict.fromkeys([symbol.upper(), "INFY.NS", "TCS.NS", "RELIANCE.NS"])),
+            help="Nearest support/resistance zones and candlestick patterns from the last 5 bars"
+        )
+        if st.button("🧭 Scan Watchlist"):
+            try:
+                watchlist = [s.strip() for s in watchlist_text.split(",") if s.strip()]
+                st.dataframe(scan_watchlist(watchlist).round(2))
+            except Exception as e:
+                st.error(f"Error scanning watchlist: {str(e)}")
+
+        st.divider()
+        st.write("**📸 Saved Analyses:**")
+        show_snapshot_list(symbol.strip())
+
         st.write("**Coming Soon:**")
-        st.info("• Portfolio analysis • Sector comparison • Historical performance • Risk assessment")
+        st.info("• Sector comparison • Historical performance")
+
+    # Answer all queued AI tasks for this page in one round-trip
+    if batch.tasks:
+        with st.spinner("🤖 Generating AI insights..."):
+            try:
+                batch.run()
+            except Exception as e:
+                st.error(f"Error getting AI response: {str(e)}")
+                st.info("💡 Try rephrasing your question or check connection")
+
+        # Keep finished professional analyses so they can be reopened or shared without re-querying
+        if 'analysis' in batch.results:
+            try:
+                snapshot_id = save_analysis(symbol.strip(), chart_data, news_items, batch.results, meta={
+                    'query': query,
+                    'focus': analysis_type,
+                    'indicators': st.session_state.get('chart_indicators'),
+                    'data_mode': get_provider().mode,
+                })
+                if snapshot_id:
+                    st.session_state.last_snapshot = snapshot_id
+                    st.caption(f"📸 Saved as snapshot `{snapshot_id}` • share or reopen with `?snapshot={snapshot_id}`")
+            except Exception as e:
+                st.caption(f"Could not save snapshot: {e}")
 
 else:
     # Welcome section (Enhanced)
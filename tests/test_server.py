@@ -0,0 +1,161 @@
+import asyncio
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+
+import pytest
+
+# Everything runs against the replay provider with synthetic data: no network, no keys
+_tmp = tempfile.mkdtemp(prefix="stockbot-test-")
+os.environ.update({
+    "STOCKBOT_DATA_MODE": "replay",
+    "STOCKBOT_REPLAY_SYNTHETIC": "1",
+    "STOCKBOT_CASSETTE_DIR": os.path.join(_tmp, "cassettes"),
+    "FUNDAMENTALS_STORE_PATH": os.path.join(_tmp, "fundamentals.parquet"),
+    "SNAPSHOT_DIR": os.path.join(_tmp, "snapshots"),
+    "GROQ_API_KEY": "replay",
+})
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Api_service.server import AnalysisService  # noqa: E402
+from Api_service.client import ServiceClient  # noqa: E402
+from Graphs.downsample import from_arrow, ARROW_MIME  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def service():
+    """AnalysisService listening on a free local port, run on its own event loop thread"""
+    service = AnalysisService(max_workers=4)
+    loop = asyncio.new_event_loop()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = loop.run_until_complete(asyncio.start_server(service.handle_connection, sock=sock))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield service, sock.getsockname()[1]
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+
+
+def _request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.getheader("Content-Type"), response.read()
+    finally:
+        connection.close()
+
+
+def _raw(port, payload):
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(payload)
+        return sock.recv(65536)
+
+
+def test_indicators_json_and_arrow(service):
+    _, port = service
+    status, content_type, body = _request(port, "GET", "/indicators?symbol=AAPL&period=1y")
+    assert status == 200 and content_type == "application/json"
+    frame = json.loads(body)
+    assert {'Close', 'MACD', 'RSI', 'Buy', 'Sell'} <= set(frame['columns'])
+
+    status, content_type, body = _request(port, "GET", "/indicators?symbol=AAPL&period=1y&format=arrow&max_points=50")
+    assert status == 200 and content_type == ARROW_MIME
+    assert len(from_arrow(body)) < len(frame['data'])
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_downsampled_frames_are_flagged(service, binary):
+    _, port = service
+    client = ServiceClient(f"http://127.0.0.1:{port}", binary=binary)
+    full = client.indicators("AAPL", period="1y")
+    reduced = client.indicators("AAPL", period="1y", max_points=50)
+    assert 'reduced_from' not in full.attrs
+    assert reduced.attrs['reduced_from'] == len(full) > len(reduced)
+
+
+def test_indicators_errors(service):
+    _, port = service
+    assert _request(port, "GET", "/indicators")[0] == 400
+    assert _request(port, "GET", "/indicators?symbol=AAPL&indicators=NOPE")[0] == 400
+    assert _request(port, "GET", "/indicators?symbol=AAPL&max_points=many")[0] == 400
+    assert _request(port, "GET", "/nowhere")[0] == 404
+    assert _request(port, "POST", "/indicators?symbol=AAPL")[0] == 405
+
+
+def test_responses_are_cached(service):
+    svc, port = service
+    first = _request(port, "GET", "/indicators?symbol=MSFT")
+    cached = len(svc._cache)
+    assert _request(port, "GET", "/indicators?symbol=MSFT") == first
+    assert len(svc._cache) == cached
+    assert any(key[0] == 'indicators' and ('symbol', 'MSFT') in key[1] for key in svc._cache)
+
+
+def test_identical_requests_are_coalesced(service):
+    svc, _ = service
+    calls = []
+
+    def slow(params, body):
+        calls.append(params)
+        threading.Event().wait(0.2)
+        return {'symbol': params['symbol']}
+
+    svc.routes[('GET', '/slow')] = slow
+
+    async def burst():
+        return await asyncio.gather(*(svc.dispatch('GET', '/slow?symbol=X', b'') for _ in range(5)))
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        del svc.routes[('GET', '/slow')]
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+
+
+def test_news(service):
+    _, port = service
+    status, _, body = _request(port, "GET", "/news?symbol=AAPL")
+    assert status == 200
+    assert isinstance(json.loads(body), list)
+
+
+def test_insights(service):
+    _, port = service
+    request = {'symbol': 'AAPL', 'tasks': [{'id': 'chart_insight', 'prompt': 'Summarise the trend', 'short': True}]}
+    status, _, body = _request(port, "POST", "/insights", body=json.dumps(request))
+    assert status == 200
+    payload = json.loads(body)
+    assert set(payload['answers']) == {'chart_insight'}
+    assert payload['requests_made'] >= 1
+
+
+@pytest.mark.parametrize("body", [b'{bad', b'[1]', b'{"tasks": []}', b'{"symbol": "AAPL", "tasks": 5}',
+                                  b'{"symbol": "AAPL", "tasks": [{"prompt": "no id"}]}'])
+def test_insights_rejects_malformed_requests(service, body):
+    _, port = service
+    status, _, payload = _request(port, "POST", "/insights", body=body)
+    assert status == 400
+    assert 'error' in json.loads(payload)
+
+
+@pytest.mark.parametrize("length", [b'abc', b'-5'])
+def test_invalid_content_length(service, length):
+    _, port = service
+    response = _raw(port, b"POST /insights HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 ")
+
+
+def test_fundamentals_are_valid_json(service):
+    _, port = service
+    status, _, body = _request(port, "GET", "/fundamentals?symbol=AAPL")
+    assert status == 200
+    # Strict parsing: NaN must have been sent as null
+    json.loads(body, parse_constant=lambda name: pytest.fail(f"non-JSON constant {name}"))